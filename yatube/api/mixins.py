@@ -0,0 +1,328 @@
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Max
+from django.http import Http404, StreamingHttpResponse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+)
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .pagination import query_flag
+from .parsers import NDJSONParser
+from core import counting
+from core.cache import get_versions
+from core.paginator import KeysetPaginator
+
+
+def get_query_plan(serializer, model, prefix=''):
+    """
+    Связи и колонки, которые читает сериализатор.
+
+    Возвращает (select_related, prefetch_related, only); only равно
+    None, если какое-то поле берет данные не из колонок модели
+    (SerializerMethodField, свойства, source='*') и ограничивать
+    SELECT нельзя. Колонки SerializerMethodField можно перечислить в
+    атрибуте сериализатора query_sources = {'поле': ('колонка', ...)}.
+    """
+    select, prefetch, only = set(), set(), set()
+    query_sources = getattr(serializer, 'query_sources', {})
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in query_sources:
+            # колонки, которые читает SerializerMethodField
+            if only is not None:
+                only.update(
+                    f'{prefix}{source}' for source in query_sources[name]
+                )
+            continue
+        if field.source == '*':
+            only = None
+            continue
+        current, path = model, prefix
+        for position, attr in enumerate(field.source_attrs):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                only = None
+                break
+            name = f'{path}{attr}'
+            last = position == len(field.source_attrs) - 1
+            if not model_field.is_relation:
+                if only is not None:
+                    only.add(name)
+                break
+            if model_field.many_to_many or model_field.one_to_many:
+                prefetch.add(name)
+                break
+            if last and isinstance(field, serializers.PrimaryKeyRelatedField):
+                # значение берется из колонки *_id без JOIN
+                if only is not None and model_field.concrete:
+                    only.add(name)
+                break
+            select.add(name)
+            if only is not None and model_field.concrete:
+                only.add(name)
+            current, path = model_field.related_model, f'{name}__'
+            if not last:
+                continue
+            if isinstance(field, serializers.SlugRelatedField):
+                if only is not None:
+                    only.add(f'{path}{field.slug_field}')
+            elif isinstance(field, serializers.BaseSerializer):
+                nested = get_query_plan(
+                    getattr(field, 'child', field), current, path
+                )
+                select |= nested[0]
+                prefetch |= nested[1]
+                if only is not None and nested[2] is not None:
+                    only |= nested[2]
+                else:
+                    only = None
+            else:
+                only = None
+    return select, prefetch, only
+
+
+class OptimizedQuerysetMixin:
+    """
+    Запросы viewset'а с select_related, prefetch_related и only,
+    выведенными из полей сериализатора, чтобы связанные объекты
+    списка не загружались отдельным запросом на каждую запись.
+    only применяется только к чтению: при записи модель сохраняется
+    целиком.
+    """
+
+    def filter_queryset(self, queryset):
+        # не get_queryset: viewset'ы переопределяют его, а filter_queryset
+        # вызывается и для списка, и в get_object
+        queryset = super().filter_queryset(queryset).all()
+        select, prefetch, only = get_query_plan(
+            self.get_serializer(), queryset.model
+        )
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        if only and self.request.method in SAFE_METHODS:
+            pk_name = queryset.model._meta.pk.name
+            queryset = queryset.only(pk_name, *sorted(only))
+        return queryset
+
+
+class ConditionalGetMixin:
+    """
+    ETag и ответ 304 Not Modified для list и retrieve без сериализации.
+
+    ETag строится по наибольшему значению etag_field отфильтрованной
+    выборки (один запрос по индексу, без COUNT) и по версиям областей
+    кеша: etag_scopes и области количества строк модели
+    (core.counting.get_scope). Наибольшее значение замечает добавление
+    записей, в том числе массовое мимо сигналов; версия области
+    количества — добавление и удаление записей модели; etag_scopes —
+    правку записей и связанных объектов (например, смену имени автора).
+    В etag_scopes можно подставлять kwargs представления: 'post:{post_id}'.
+    """
+    etag_field = 'created'
+    etag_scopes = ()
+
+    def get_etag_scopes(self):
+        return [
+            counting.get_scope(self.get_queryset().model),
+            *(scope.format(**self.kwargs) for scope in self.etag_scopes),
+        ]
+
+    def get_etag(self, state):
+        scopes = self.get_etag_scopes()
+        versions = get_versions(scopes)
+        request = self.request
+        signature = '\n'.join([
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+            str(request.user.pk),
+            str(state['last']),
+            *(f'{scope}={versions[scope]}' for scope in scopes),
+        ])
+        return '"{}"'.format(hashlib.md5(signature.encode()).hexdigest())
+
+    def get_etag_state(self, queryset) -> dict:
+        """Наибольшее значение etag_field выборки."""
+        try:
+            queryset.model._meta.get_field(self.etag_field)
+            field = self.etag_field
+        except FieldDoesNotExist:
+            field = 'pk'
+        return queryset.order_by().aggregate(last=Max(field))
+
+    def _conditional(self, state, action, request, *args, **kwargs):
+        etag = self.get_etag(state)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = action(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            patch_cache_control(
+                response, private=True, max_age=0, must_revalidate=True
+            )
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        state = self.get_etag_state(
+            self.filter_queryset(self.get_queryset())
+        )
+        return self._conditional(
+            state, super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            state = self.get_etag_state(
+                self.filter_queryset(self.get_queryset()).filter(
+                    **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+                )
+            )
+        except (TypeError, ValueError, DjangoValidationError):
+            # как get_object_or_404 в DRF: некорректный ключ — 404
+            raise Http404
+        if state['last'] is None:
+            # объекта нет: If-None-Match: * не должен дать 304 вместо 404
+            return super().retrieve(request, *args, **kwargs)
+        return self._conditional(
+            state, super().retrieve, request, *args, **kwargs
+        )
+
+
+class BulkCreateMixin:
+    """
+    POST {list}/bulk/ — создание пачки объектов одним запросом.
+
+    Тело — JSON-массив или NDJSON. Каждый элемент проверяется
+    сериализатором отдельно; корректные сохраняются одной операцией
+    perform_bulk_create, ошибки возвращаются с номером элемента:
+
+        {"created": [...], "errors": [{"index": 3, "errors": {...}}]}
+
+    Статус 201, если сохранены все элементы, 207 — если часть, и 400,
+    если ни одного.
+    """
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='bulk',
+        parser_classes=(JSONParser, NDJSONParser),
+    )
+    def bulk_create(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError('Ожидается массив объектов.')
+        if len(items) > settings.BULK_CREATE_MAX_ITEMS:
+            raise ValidationError(
+                f'Не больше {settings.BULK_CREATE_MAX_ITEMS} объектов '
+                f'за запрос.'
+            )
+        valid, errors = [], []
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                valid.append(serializer)
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+        created = self.perform_bulk_create(valid) if valid else []
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {
+                'created': self.get_serializer(created, many=True).data,
+                'errors': errors,
+            },
+            status=response_status,
+        )
+
+    @transaction.atomic
+    def perform_bulk_create(self, serializers):
+        """
+        Сохранить проверенные сериализаторы, вернуть объекты.
+
+        По умолчанию каждый объект сохраняется через perform_create в
+        общей транзакции; viewset'ы переопределяют метод, чтобы
+        сохранить пачку одним INSERT.
+        """
+        for serializer in serializers:
+            self.perform_create(serializer)
+        return [serializer.instance for serializer in serializers]
+
+
+class StreamingListMixin:
+    """
+    Потоковая выгрузка списка: ?stream=true.
+
+    Вместо страницы отдается JSON-массив всей отфильтрованной выборки.
+    Выборка читается пачками по API_STREAM_CHUNK_SIZE записей через
+    KeysetPaginator (каждая пачка — отдельный запрос со своими
+    prefetch_related), а каждая пачка сериализуется и отправляется
+    клиенту сразу, поэтому память воркера не растет с размером
+    выборки, а первые байты уходят после первой пачки. Порядок —
+    stream_ordering или ordering класса паджинации; последнее поле
+    должно быть уникальным.
+    """
+    stream_query_param = 'stream'
+    stream_ordering = None
+
+    def get_stream_ordering(self):
+        return (
+            self.stream_ordering
+            or getattr(self.pagination_class, 'ordering', None)
+            or ('pk',)
+        )
+
+    def list(self, request, *args, **kwargs):
+        renderer = getattr(request, 'accepted_renderer', None)
+        if not (
+            query_flag(request, self.stream_query_param)
+            and isinstance(renderer, JSONRenderer)
+        ):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            self._stream(queryset, renderer),
+            content_type=renderer.media_type,
+        )
+        # nginx не должен собирать поток в буфер
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def _stream(self, queryset, renderer):
+        paginator = KeysetPaginator(
+            queryset,
+            settings.API_STREAM_CHUNK_SIZE,
+            self.get_stream_ordering(),
+        )
+        page = paginator.page()
+        separator = b'['
+        while True:
+            if page.object_list:
+                data = self.get_serializer(page.object_list, many=True).data
+                # пачка рендерится массивом, в поток идут его элементы
+                yield separator + renderer.render(data)[1:-1]
+                separator = b','
+            if not page.has_next():
+                break
+            page = paginator.page(page.next_cursor)
+        yield b'[]' if separator == b'[' else b']'
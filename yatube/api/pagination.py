@@ -0,0 +1,154 @@
+from collections import OrderedDict
+
+from django.db.models.query import QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from core import counting
+from core.paginator import InvalidCursor, KeysetPaginator
+from posts.search import SEARCH_ORDERING
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def query_flag(request, param) -> bool:
+    """Флаг в параметрах запроса: ?count=true, ?stream=1."""
+    return request.query_params.get(param, '').lower() in TRUE_VALUES
+
+
+def get_count(queryset) -> int:
+    """Количество через core.counting: для больших выборок — оценка."""
+    if isinstance(queryset, QuerySet):
+        return counting.count(queryset)
+    return len(queryset)
+
+
+class EstimatedLimitOffsetPagination(LimitOffsetPagination):
+    """LimitOffsetPagination с количеством из core.counting."""
+
+    def get_count(self, queryset):
+        return get_count(queryset)
+
+
+class CountlessLimitOffsetPagination(EstimatedLimitOffsetPagination):
+    """
+    LimitOffsetPagination, которая не выполняет COUNT(*) без ?count=true:
+    наличие следующей страницы определяется по лишней записи.
+    """
+    default_limit = 10
+    max_limit = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.with_count = query_flag(request, 'count')
+        if self.with_count:
+            return super().paginate_queryset(queryset, request, view)
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        self.request = request
+        self.count = None
+        items = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(items) > self.limit
+        return items[:self.limit]
+
+    def get_next_link(self):
+        if self.with_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.with_count:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Паджинация по курсору на (created, id) поверх KeysetPaginator.
+
+    Любая страница стоит столько же, сколько первая, а новые записи не
+    сдвигают уже полученные страницы. ?limit= задает размер страницы,
+    ?count=true добавляет в ответ общее количество. Клиенты, которые
+    передают ?offset=, по-прежнему получают limit/offset.
+    """
+    ordering = ('-created', '-id')
+    page_size = 10
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    offset_query_param = 'offset'
+    count_query_param = 'count'
+    offset_pagination_class = CountlessLimitOffsetPagination
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.offset_pagination = None
+        queryset = queryset.order_by(*self.ordering)
+        if self.offset_query_param in request.query_params:
+            self.offset_pagination = self.offset_pagination_class()
+            return self.offset_pagination.paginate_queryset(
+                queryset, request, view
+            )
+        self.count = (
+            get_count(queryset)
+            if query_flag(request, self.count_query_param) else None
+        )
+        paginator = KeysetPaginator(
+            queryset, self.get_page_size(request), self.ordering
+        )
+        try:
+            self.page = paginator.page(
+                request.query_params.get(self.cursor_query_param)
+            )
+        except InvalidCursor:
+            raise NotFound(self.invalid_cursor_message)
+        return list(self.page)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def _get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._get_link(self.page.next_cursor)
+
+    def get_previous_link(self):
+        return self._get_link(self.page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        if self.offset_pagination is not None:
+            return self.offset_pagination.get_paginated_response(data)
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+
+class SearchPagination(KeysetPagination):
+    """Результаты поиска: сначала самые релевантные."""
+    ordering = SEARCH_ORDERING
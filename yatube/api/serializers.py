@@ -1,31 +1,82 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.validators import UniqueTogetherValidator
 
-from posts.models import Comment, Follow, Group, Post
+from posts.models import AuthorStats, Comment, Follow, Group, Post
 
 User = get_user_model()
 
 
-class GroupSerializer(serializers.ModelSerializer):
+def _split(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class DynamicFieldsMixin:
+    """
+    Поля ответа на GET-запрос по параметрам запроса.
+
+    ?fields=id,created оставляет только перечисленные поля, ?expand=
+    author,group заменяет ключ связанного объекта самим объектом
+    (сериализаторы — в get_expandable_fields). Так как
+    OptimizedQuerysetMixin строит запрос по полям сериализатора,
+    вместе с полями сужается и список колонок SELECT, а развернутые
+    объекты загружаются через select_related. Неизвестные имена
+    пропускаются; запись всегда работает с полным набором полей.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        expandable = self.get_expandable_fields()
+        for name in _split(request.query_params.get('expand')):
+            if name in expandable and name in self.fields:
+                self.fields[name] = expandable[name](read_only=True)
+        names = _split(request.query_params.get('fields'))
+        if names:
+            for name in set(self.fields) - set(names):
+                self.fields.pop(name)
+
+    def get_expandable_fields(self) -> dict:
+        return {}
+
+
+class GroupSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Group
         fields = '__all__'
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
     )
+    image_variants = serializers.SerializerMethodField()
+    query_sources = {'image_variants': ('image', 'image_variants')}
 
     class Meta:
-        fields = '__all__'
+        exclude = ('search_vector',)
         model = Post
 
+    def get_expandable_fields(self):
+        return {'author': AuthorSerializer, 'group': GroupSerializer}
+
+    def get_image_variants(self, post):
+        """Копии картинки разной ширины и формата для srcset."""
+        request = self.context.get('request')
+        variants = post.get_image_variants()
+        for variant in variants:
+            del variant['name']
+            if request is not None:
+                variant['url'] = request.build_absolute_uri(variant['url'])
+        return variants
+
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username'
     )
@@ -35,19 +86,22 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         read_only_fields = ('post',)
 
+    def get_expandable_fields(self):
+        return {'author': AuthorSerializer}
 
-class FollowSerializer(serializers.ModelSerializer):
+
+class FollowSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username',
         default=serializers.CurrentUserDefault(),
     )
     following = serializers.SlugRelatedField(
-        slug_field='username', queryset=User.objects.all()
+        source='author', slug_field='username', queryset=User.objects.all()
     )
 
     class Meta:
-        fields = '__all__'
+        fields = ('id', 'user', 'following')
         model = Follow
         validators = (
             UniqueTogetherValidator(
@@ -63,3 +117,18 @@ class FollowSerializer(serializers.ModelSerializer):
                 'Нельзя подписаться на самого себя!'
             )
         return value
+
+
+class AuthorStatsSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        exclude = ('user',)
+        model = AuthorStats
+
+
+class AuthorSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    stats = AuthorStatsSerializer(read_only=True)
+
+    class Meta:
+        fields = ('username', 'first_name', 'last_name', 'stats')
+        model = User
@@ -0,0 +1,127 @@
+import json
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.mixins import BulkCreateMixin
+from api.serializers import PostSerializer
+from api.views import PostViewSet
+from posts.models import AuthorStats, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class BulkCreateTests(TestCase):
+    """Массовое создание постов и комментариев."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=cls.follower, author=cls.user)
+        cls.group = Group.objects.create(
+            title='title', slug='slug', description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(BulkCreateTests.user)
+
+    def test_bulk_create_posts(self):
+        items = [
+            {'text': 'Первый', 'group': BulkCreateTests.group.id},
+            {'text': 'Второй'},
+        ]
+        response = self.client.post(
+            reverse('api:posts-bulk-create'), items, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['errors'], [])
+        ids = [item['id'] for item in response.data['created']]
+        self.assertEqual(len(ids), 2)
+        posts = Post.objects.filter(pk__in=ids)
+        self.assertEqual(
+            [Post.objects.get(pk=pk).text for pk in ids],
+            ['Первый', 'Второй'],
+        )
+        stats = AuthorStats.objects.get(pk=BulkCreateTests.user.pk)
+        self.assertEqual(stats.posts_count, 3)
+        self.assertEqual(stats.last_post_at, posts.latest('created').created)
+        self.assertEqual(
+            TimelineEntry.objects.filter(
+                user=BulkCreateTests.follower, post__in=ids
+            ).count(),
+            2,
+        )
+
+    def test_default_perform_bulk_create(self):
+        """Без переопределения объекты сохраняются через perform_create."""
+        view = PostViewSet()
+        view.request = SimpleNamespace(user=BulkCreateTests.user)
+        serializers = [
+            PostSerializer(data={'text': text}) for text in ('А', 'Б')
+        ]
+        for serializer in serializers:
+            serializer.is_valid(raise_exception=True)
+        created = BulkCreateMixin.perform_bulk_create(view, serializers)
+        self.assertEqual(
+            [Post.objects.get(pk=post.pk).text for post in created],
+            ['А', 'Б'],
+        )
+        self.assertEqual(
+            AuthorStats.objects.get(pk=BulkCreateTests.user.pk).posts_count,
+            3,
+        )
+
+    def test_per_item_errors(self):
+        items = [{'text': 'Пост'}, {'group': 0}, {'text': ''}]
+        response = self.client.post(
+            reverse('api:posts-bulk-create'), items, format='json'
+        )
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(len(response.data['created']), 1)
+        self.assertEqual(
+            [error['index'] for error in response.data['errors']], [1, 2]
+        )
+        self.assertIn('text', response.data['errors'][0]['errors'])
+        response = self.client.post(
+            reverse('api:posts-bulk-create'), items[1:], format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_create_comments_ndjson(self):
+        post = BulkCreateTests.post
+        body = '\n'.join(
+            json.dumps({'text': f'Комментарий {number}'})
+            for number in range(3)
+        )
+        response = self.client.post(
+            reverse('api:comments-bulk-create', kwargs={'post_id': post.id}),
+            body,
+            content_type='application/x-ndjson',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created']), 3)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 3)
+        self.assertEqual(post.comments.count(), 3)
+        stats = AuthorStats.objects.get(pk=BulkCreateTests.user.pk)
+        self.assertEqual(stats.comments_count, 3)
+
+    def test_not_a_list(self):
+        response = self.client.post(
+            reverse('api:posts-bulk-create'), {'text': 'Пост'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_anonymous(self):
+        response = APIClient().post(
+            reverse('api:posts-bulk-create'), [{'text': 'Пост'}],
+            format='json',
+        )
+        self.assertEqual(response.status_code, 401)
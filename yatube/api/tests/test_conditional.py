@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    """ETag и 304 для списков и объектов API."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='title', slug='slug', description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        cls.comment = Comment.objects.create(
+            author=cls.author, post=cls.post, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(ConditionalGetTests.user)
+
+    def assertNotModified(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        return etag
+
+    def test_not_modified(self):
+        post = ConditionalGetTests.post
+        comment = ConditionalGetTests.comment
+        urls = (
+            reverse('api:posts-list'),
+            reverse('api:posts-detail', kwargs={'pk': post.id}),
+            reverse('api:comments-list', kwargs={'post_id': post.id}),
+            reverse('api:comments-detail',
+                    kwargs={'post_id': post.id, 'pk': comment.id}),
+            reverse('api:groups-list'),
+            reverse('api:groups-detail',
+                    kwargs={'pk': ConditionalGetTests.group.id}),
+            reverse('api:follow-list'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNotModified(url)
+
+    def test_malformed_pk_is_not_found(self):
+        post = ConditionalGetTests.post
+        for url in (
+            '/api/v1/posts/abc/',
+            '/api/v1/groups/abc/',
+            f'/api/v1/posts/{post.id}/comments/abc/',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_no_count_query(self):
+        url = reverse('api:posts-list') + '?cursor='
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, HTTP_IF_NONE_MATCH='"etag"')
+        self.assertFalse(any(
+            'COUNT(' in query['sql'] for query in queries.captured_queries
+        ))
+
+    def test_etag_changes(self):
+        post = ConditionalGetTests.post
+        comments_url = reverse('api:comments-list',
+                               kwargs={'post_id': post.id})
+        posts_url = reverse('api:posts-list')
+        changes = (
+            (posts_url, lambda: Post.objects.bulk_create(
+                [Post(author=ConditionalGetTests.author, text='Новый')]
+            )),
+            (posts_url, lambda: Post.objects.filter(pk=post.pk).update(
+                text='Правка'
+            ) and post.save()),
+            (comments_url, lambda: Comment.objects.create(
+                author=ConditionalGetTests.user, post=post, text='Еще'
+            )),
+            (comments_url, lambda: ConditionalGetTests.author.save()),
+        )
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.assertNotModified(url)
+                change()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_missing_object(self):
+        response = self.client.get(
+            reverse('api:posts-detail', kwargs={'pk': 0}),
+            HTTP_IF_NONE_MATCH='*',
+        )
+        self.assertEqual(response.status_code, 404)
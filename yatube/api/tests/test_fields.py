@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class SparseFieldsTests(TestCase):
+    """Параметры ?fields= и ?expand=."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='title', slug='slug', description='Тестовое описание'
+        )
+        for number in range(3):
+            author = User.objects.create_user(username=f'author{number}')
+            cls.post = Post.objects.create(
+                author=author, text='Пост', group=cls.group
+            )
+            Comment.objects.create(
+                author=author, post=cls.post, text='Комментарий'
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(SparseFieldsTests.user)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        if isinstance(data, dict):
+            data = data['results']
+        return data, queries.captured_queries
+
+    def test_fields_narrow_output_and_select(self):
+        results, queries = self.get(
+            reverse('api:posts-list'), fields='id,created'
+        )
+        self.assertEqual(set(results[0]), {'id', 'created'})
+        self.assertNotIn('"posts_post"."text"', queries[-1]['sql'])
+
+    def test_unknown_fields_are_ignored(self):
+        results, _ = self.get(
+            reverse('api:groups-list'), fields='slug,unknown'
+        )
+        self.assertEqual(results, [{'slug': 'slug'}])
+
+    def test_expand_without_extra_queries(self):
+        url = reverse('api:posts-list')
+        _, plain = self.get(url)
+        results, expanded = self.get(url, expand='author,group')
+        self.assertEqual(len(expanded), len(plain))
+        self.assertEqual(results[0]['group']['slug'], 'slug')
+        self.assertEqual(
+            results[0]['author']['username'],
+            SparseFieldsTests.post.author.username,
+        )
+        results, _ = self.get(
+            reverse('api:comments-list',
+                    kwargs={'post_id': SparseFieldsTests.post.id}),
+            expand='author',
+            fields='id,author',
+        )
+        self.assertEqual(set(results[0]), {'id', 'author'})
+        self.assertIn('stats', results[0]['author'])
+
+    def test_write_ignores_fields(self):
+        response = self.client.post(
+            reverse('api:posts-list') + '?fields=id&expand=group',
+            {'text': 'Новый', 'group': SparseFieldsTests.group.id},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['group'], SparseFieldsTests.group.id)
+        self.assertEqual(response.data['text'], 'Новый')
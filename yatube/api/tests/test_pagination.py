@@ -0,0 +1,132 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class KeysetPaginationTests(TestCase):
+    """Курсорная паджинация публикаций и комментариев."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {number}')
+            for number in range(4)
+        )
+        Comment.objects.bulk_create(
+            Comment(author=cls.user, post=cls.post, text=f'Комментарий {n}')
+            for n in range(5)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def walk(self, url):
+        """Пройти все страницы по ссылкам next."""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_cursor_walks_all_records_in_order(self):
+        post = KeysetPaginationTests.post
+        cases = (
+            (reverse('api:posts-list'), Post.objects.all()),
+            (reverse('api:comments-list', kwargs={'post_id': post.id}),
+             post.comments.all()),
+        )
+        for url, queryset in cases:
+            with self.subTest(url=url):
+                expected = list(queryset.order_by(
+                    '-created', '-id'
+                ).values_list('id', flat=True))
+                self.assertEqual(self.walk(f'{url}?limit=2'), expected)
+
+    def test_previous_link(self):
+        response = self.client.get(reverse('api:posts-list') + '?limit=2')
+        self.assertIsNone(response.data['previous'])
+        first = response.data['results']
+        response = self.client.get(response.data['next'])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(response.data['results'], first)
+
+    def test_no_count_query_by_default(self):
+        url = reverse('api:posts-list')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(any(
+            '"__count"' in query['sql'] for query in queries.captured_queries
+        ))
+        response = self.client.get(url + '?count=true')
+        self.assertEqual(response.data['count'], Post.objects.count())
+
+    def test_default_is_cursor_page_without_count(self):
+        """Без параметров — первая страница по курсору, без COUNT."""
+        post = Post.objects.create(
+            author=KeysetPaginationTests.user, text='Обсуждаемый'
+        )
+        Comment.objects.bulk_create(
+            Comment(author=KeysetPaginationTests.user, post=post,
+                    text=f'Комментарий {n}')
+            for n in range(12)
+        )
+        for url in (
+            reverse('api:posts-list'),
+            reverse('api:comments-list', kwargs={'post_id': post.id}),
+        ):
+            with self.subTest(url=url), CaptureQueriesContext(
+                connection
+            ) as queries:
+                response = self.client.get(url)
+                self.assertEqual(
+                    list(response.data), ['next', 'previous', 'results']
+                )
+                self.assertLessEqual(len(response.data['results']), 10)
+                self.assertFalse(any(
+                    '"__count"' in query['sql']
+                    for query in queries.captured_queries
+                ))
+        self.assertIn('cursor=', response.data['next'])
+        self.assertEqual(self.walk(url), list(post.comments.order_by(
+            '-created', '-id'
+        ).values_list('id', flat=True)))
+
+    def test_offset_opt_in(self):
+        url = reverse('api:posts-list')
+        expected = list(Post.objects.order_by(
+            '-created', '-id'
+        ).values_list('id', flat=True))
+        response = self.client.get(url + '?limit=2&offset=2')
+        self.assertEqual(
+            [item['id'] for item in response.data['results']], expected[2:4]
+        )
+        self.assertIn('offset=4', response.data['next'])
+        self.assertNotIn('count', response.data)
+        response = self.client.get(url + '?limit=2&offset=4&count=1')
+        self.assertEqual(response.data['count'], len(expected))
+        self.assertIsNone(response.data['next'])
+        response = self.client.get(
+            reverse(
+                'api:comments-list',
+                kwargs={'post_id': KeysetPaginationTests.post.id},
+            ) + '?limit=2&offset=4'
+        )
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertNotIn('count', response.data)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('api:posts-list') + '?cursor=x')
+        self.assertEqual(response.status_code, 404)
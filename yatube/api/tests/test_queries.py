@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiQueriesTests(TestCase):
+    """Число запросов списка не зависит от количества записей в нем."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='title',
+            slug='slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый пост', group=cls.group
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(ApiQueriesTests.user)
+
+    def add_author(self):
+        author = User.objects.create_user(
+            username=f'author{User.objects.count()}'
+        )
+        post = Post.objects.create(
+            author=author, text='Пост', group=ApiQueriesTests.group
+        )
+        Comment.objects.create(
+            author=author, post=ApiQueriesTests.post, text='Комментарий'
+        )
+        Follow.objects.create(user=ApiQueriesTests.user, author=author)
+        return post
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries.captured_queries]
+
+    def assertQueriesDoNotGrow(self, url):
+        self.add_author()
+        few = self.count_queries(url)
+        for _ in range(3):
+            self.add_author()
+        many = self.count_queries(url)
+        self.assertEqual(len(few), len(many), '\n'.join(many))
+
+    def test_list_queries_do_not_grow(self):
+        urls = (
+            reverse('api:posts-list') + '?limit=100',
+            reverse('api:comments-list',
+                    kwargs={'post_id': ApiQueriesTests.post.id}),
+            reverse('api:follow-list'),
+            reverse('api:groups-list'),
+            reverse('api:authors-list') + '?limit=100',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertQueriesDoNotGrow(url)
+
+    def test_list_reads_only_serialized_columns(self):
+        """Комментарии читаются без лишних колонок автора."""
+        self.add_author()
+        queries = self.count_queries(reverse(
+            'api:comments-list', kwargs={'post_id': ApiQueriesTests.post.id}
+        ))
+        self.assertNotIn('"auth_user"."password"', queries[-1])
+
+    def test_follow_create(self):
+        author = User.objects.create_user(username='followed')
+        response = self.client.post(
+            reverse('api:follow-list'), {'following': author.username}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['following'], author.username)
+        response = self.client.post(
+            reverse('api:follow-list'), {'following': author.username}
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,90 @@
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.renderers import FastJSONRenderer
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class FastJSONRendererTests(TestCase):
+
+    def test_same_output_as_json_renderer(self):
+        data = {
+            'text': 'Текст',
+            'created': timezone.now(),
+            'price': Decimal('1.50'),
+            'items': [1, None, True],
+            1: 'ключ-число',
+        }
+        fast = FastJSONRenderer().render(data)
+        self.assertEqual(
+            json.loads(fast), json.loads(JSONRenderer().render(data))
+        )
+        self.assertIn('Текст'.encode(), fast)
+
+
+@override_settings(API_STREAM_CHUNK_SIZE=2)
+class StreamingListTests(TestCase):
+    """Потоковая выгрузка списков ?stream=true."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {number}')
+            for number in range(4)
+        )
+        Comment.objects.bulk_create(
+            Comment(author=cls.user, post=cls.post, text=f'Комментарий {n}')
+            for n in range(3)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def get_stream(self, url):
+        response = self.client.get(url, {'stream': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_stream_returns_whole_list_in_order(self):
+        post = StreamingListTests.post
+        cases = (
+            (reverse('api:posts-list'), Post.objects.all()),
+            (reverse('api:comments-list', kwargs={'post_id': post.id}),
+             post.comments.all()),
+        )
+        for url, queryset in cases:
+            with self.subTest(url=url):
+                expected = list(queryset.order_by(
+                    '-created', '-id'
+                ).values_list('id', flat=True))
+                self.assertEqual(
+                    [item['id'] for item in self.get_stream(url)], expected
+                )
+
+    def test_stream_matches_paginated_items(self):
+        url = reverse('api:posts-list')
+        page = self.client.get(url, {'limit': 100}).json()['results']
+        self.assertEqual(self.get_stream(url), page)
+
+    def test_empty_stream(self):
+        self.assertEqual(self.get_stream(reverse('api:groups-list')), [])
+        self.assertEqual(
+            [item['username'] for item in self.get_stream(
+                reverse('api:authors-list')
+            )],
+            ['user'],
+        )
@@ -1,43 +1,107 @@
 from django.contrib.auth.base_user import AbstractBaseUser
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import filters
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.mixins import CreateModelMixin, ListModelMixin
-from rest_framework.pagination import LimitOffsetPagination
-from rest_framework.permissions import (IsAuthenticated,
+from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import (GenericViewSet, ModelViewSet,
                                      ReadOnlyModelViewSet)
 
+from .mixins import (BulkCreateMixin, ConditionalGetMixin,
+                     OptimizedQuerysetMixin, StreamingListMixin)
+from .pagination import (EstimatedLimitOffsetPagination, KeysetPagination,
+                         SearchPagination)
 from .permissions import IsAuthorOrReadOnly
-from .serializers import (CommentSerializer, FollowSerializer, GroupSerializer,
-                          PostSerializer)
-from posts.models import Group, Post
+from .serializers import (AuthorSerializer, CommentSerializer,
+                          FollowSerializer, GroupSerializer, PostSerializer)
+from posts import autocomplete
+from posts.bulk import create_comments, create_posts
+from posts.models import Comment, Follow, Group, Post, User
+from posts.search import get_terms, search_posts
 
 
-class IsAuthorOrReadOnlyModelViewSet(ModelViewSet):
+class IsAuthorOrReadOnlyModelViewSet(OptimizedQuerysetMixin, ModelViewSet):
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
 
 
-class GroupViewSet(ReadOnlyModelViewSet):
+class GroupViewSet(ConditionalGetMixin, StreamingListMixin,
+                   OptimizedQuerysetMixin, ReadOnlyModelViewSet):
     queryset = Group.objects.all()
+    etag_scopes = ('groups',)
     serializer_class = GroupSerializer
 
 
-class PostViewSet(IsAuthorOrReadOnlyModelViewSet):
+class AuthorViewSet(StreamingListMixin, OptimizedQuerysetMixin,
+                    ReadOnlyModelViewSet):
+    queryset = User.objects.order_by('username')
+    serializer_class = AuthorSerializer
+    pagination_class = EstimatedLimitOffsetPagination
+    stream_ordering = ('username',)
+    lookup_field = 'username'
+    lookup_value_regex = r'[\w.@+-]+'
+
+
+class PostViewSet(BulkCreateMixin, ConditionalGetMixin, StreamingListMixin,
+                  IsAuthorOrReadOnlyModelViewSet):
     queryset = Post.objects.all()
+    etag_scopes = ('index', 'users', 'groups')
     serializer_class = PostSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetPagination
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-
-class CommentViewSet(IsAuthorOrReadOnlyModelViewSet):
+    @action(detail=False, url_path='search')
+    def search(self, request, *args, **kwargs):
+        """Полнотекстовый поиск: ?q=слова, сначала самые релевантные."""
+        query = request.query_params.get('q', '')
+        if not get_terms(query):
+            raise ValidationError({'q': 'Укажите слова для поиска.'})
+        queryset = self.filter_queryset(
+            search_posts(query, self.get_queryset())
+        )
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(queryset, request, self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    def perform_bulk_create(self, serializers):
+        return create_posts(
+            Post(**serializer.validated_data, author=self.request.user)
+            for serializer in serializers
+        )
+
+
+class CommentViewSet(BulkCreateMixin, ConditionalGetMixin,
+                     StreamingListMixin, IsAuthorOrReadOnlyModelViewSet):
     serializer_class = CommentSerializer
+    pagination_class = KeysetPagination
+    etag_scopes = ('post:{post_id}', 'users')
 
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, post=self.get_post())
 
+    def perform_bulk_create(self, serializers):
+        post = self.get_post()
+        return create_comments(
+            Comment(
+                **serializer.validated_data,
+                author=self.request.user,
+                post=post,
+            )
+            for serializer in serializers
+        )
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
     def get_queryset(self):
         return self.get_post().comments
 
@@ -45,15 +109,36 @@ class CommentViewSet(IsAuthorOrReadOnlyModelViewSet):
         return get_object_or_404(Post, id=self.kwargs.get('post_id'))
 
 
-class FollowViewSet(CreateModelMixin, ListModelMixin, GenericViewSet):
+class FollowViewSet(ConditionalGetMixin, StreamingListMixin,
+                    OptimizedQuerysetMixin, CreateModelMixin,
+                    ListModelMixin, GenericViewSet):
     permission_classes = (IsAuthenticated,)
+    etag_scopes = ('users',)
     serializer_class = FollowSerializer
     filter_backends = (filters.SearchFilter,)
-    search_fields = ('following__username',)
+    search_fields = ('author__username',)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
     def get_queryset(self):
         if isinstance(self.request.user, AbstractBaseUser):
-            return self.request.user.follower
+            return self.request.user.follower.all()
+        return Follow.objects.none()
+
+
+class AutocompleteView(APIView):
+    """Пользователи и сообщества, начинающиеся с ?q=, не более ?limit=."""
+    permission_classes = (AllowAny,)
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', ''))
+        except ValueError:
+            limit = None
+        if limit is not None:
+            limit = min(max(limit, 1), self.max_limit)
+        return Response(autocomplete.autocomplete(
+            request.query_params.get('q', '').strip(), limit
+        ))
@@ -0,0 +1,29 @@
+"""
+Кеш тестов — отдельный файл SQLite во временном каталоге прогона:
+cache.clear() в тестах не стирает кеш разработчика или сервера, а
+записи прошлых прогонов не попадают в новый.
+"""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+
+_cache_dir = tempfile.mkdtemp(prefix='yatube-test-cache-')
+_cache_settings = override_settings(CACHES={
+    'default': {
+        **settings.CACHES['default'],
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(_cache_dir, 'cache.sqlite3'),
+    },
+})
+
+
+def pytest_configure(config):
+    _cache_settings.enable()
+
+
+def pytest_unconfigure(config):
+    _cache_settings.disable()
+    shutil.rmtree(_cache_dir, ignore_errors=True)
@@ -0,0 +1,42 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import DeadTask, Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'attempts',
+        'run_at',
+        'locked_until',
+        'created',
+    )
+    search_fields = ('name', )
+    readonly_fields = ('attempts', 'last_error', 'created')
+
+
+@admin.register(DeadTask)
+class DeadTaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'attempts',
+        'task_created',
+        'created',
+    )
+    search_fields = ('name', )
+    actions = ('requeue', )
+
+    def requeue(self, request, queryset):
+        """Вернуть задачи в очередь с новым счетчиком попыток."""
+        Task.objects.bulk_create(
+            Task(name=dead.name, payload=dead.payload, run_at=timezone.now())
+            for dead in queryset
+        )
+        count = queryset.count()
+        queryset.delete()
+        self.message_user(request, f'Возвращено в очередь задач: {count}')
+    requeue.short_description = 'Вернуть в очередь'
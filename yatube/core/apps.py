@@ -1,5 +1,20 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        # задачи очереди регистрируются модулями tasks приложений
+        autodiscover_modules('tasks')
+        # версии кешированных количеств записей (core.counting); только
+        # для перечисленных моделей: приемник post_delete отключает
+        # быстрое удаление queryset.delete() без загрузки записей
+        from .counting import table_changed
+        for label in settings.COUNTED_MODELS:
+            model = apps.get_model(label)
+            post_save.connect(table_changed, sender=model)
+            post_delete.connect(table_changed, sender=model)
@@ -0,0 +1,45 @@
+"""
+Версии областей кеша.
+
+Область (scope) — строка вроде 'index' или 'group:5'. Закешированные
+фрагменты и страницы включают версии своих областей в ключ, а запись
+данных меняет версию затронутых областей, поэтому старые ключи
+перестают использоваться сразу, без перебора и удаления. Версия —
+время изменения в микросекундах, ее можно использовать как дату
+последнего изменения области.
+"""
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'scope-version:{}'
+
+
+def _now():
+    return time.time_ns() // 1000
+
+
+def get_versions(scopes) -> dict:
+    """Версии областей одним запросом к кешу."""
+    keys = {VERSION_KEY.format(scope): scope for scope in scopes}
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        version = _now()
+        for key in missing:
+            cache.add(key, version, None)
+        versions.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def get_version_key(scopes) -> str:
+    """Строка, меняющаяся при изменении любой из областей."""
+    versions = get_versions(scopes)
+    return '.'.join(str(versions[scope]) for scope in scopes)
+
+
+def bump_versions(*scopes):
+    version = _now()
+    cache.set_many(
+        {VERSION_KEY.format(scope): version for scope in scopes}, None
+    )
@@ -0,0 +1,283 @@
+"""
+Бэкенды кеша, общего для всех воркеров gunicorn.
+
+MemcachedCache и PyLibMCCache — для нескольких машин, SQLiteCache —
+локальная замена для тестов и одной машины: файл базы SQLite в режиме
+WAL разделяют все процессы. Все бэкенды считают попадания и промахи;
+счетчики копятся в процессе и периодически сбрасываются в сам кеш,
+откуда их читает команда cache_stats.
+"""
+import os
+import pickle
+import sqlite3
+import time
+
+from django.core.cache.backends import memcached
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+STATS_KEYS = {'hits': 'cache-stats:hits', 'misses': 'cache-stats:misses'}
+
+_MISSING = object()
+
+
+class StatsMixin:
+    """Подсчет попаданий и промахов get/get_many."""
+    stats_flush_every = 100
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats = dict.fromkeys(STATS_KEYS, 0)
+        self._counting = True
+
+    def _count(self, hits, misses):
+        if not self._counting:
+            return
+        self._stats['hits'] += hits
+        self._stats['misses'] += misses
+        if sum(self._stats.values()) >= self.stats_flush_every:
+            self.flush_stats()
+
+    def flush_stats(self):
+        stats, self._stats = self._stats, dict.fromkeys(STATS_KEYS, 0)
+        for name, key in STATS_KEYS.items():
+            if not stats[name]:
+                continue
+            try:
+                super().incr(key, stats[name])
+            except ValueError:
+                if not super().add(key, stats[name], None):
+                    super().incr(key, stats[name])
+
+    def get_stats(self) -> dict:
+        self.flush_stats()
+        stats = super().get_many(STATS_KEYS.values())
+        return {
+            name: stats.get(key, 0) for name, key in STATS_KEYS.items()
+        }
+
+    def reset_stats(self):
+        self._stats = dict.fromkeys(STATS_KEYS, 0)
+        super().delete_many(STATS_KEYS.values())
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            self._count(0, 1)
+            return default
+        self._count(1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        # базовый get_many может сам вызывать get для каждого ключа
+        self._counting = False
+        try:
+            found = super().get_many(keys, version)
+        finally:
+            self._counting = True
+        self._count(len(found), len(keys) - len(found))
+        return found
+
+
+class MemcachedCache(StatsMixin, memcached.MemcachedCache):
+    """
+    python-memcached с постоянными соединениями.
+
+    Клиент создается один раз на поток и не отключается в конце каждого
+    запроса, как в стандартном бэкенде, поэтому соединения с memcached
+    переиспользуются между запросами.
+    """
+
+    def close(self, **kwargs):
+        pass
+
+
+class PyLibMCCache(StatsMixin, memcached.PyLibMCCache):
+    pass
+
+
+class SQLiteBaseCache(BaseCache):
+    """
+    Кеш в файле SQLite, разделяемом процессами одной машины.
+
+    Соединение открывается одно на поток и живет между запросами.
+    Устаревшие записи вычищаются каждые cull_every записей, а при
+    превышении MAX_ENTRIES удаляется 1/CULL_FREQUENCY записей с
+    ближайшим сроком истечения.
+    """
+    cull_every = 1000
+    default_max_entries = 100000
+
+    def __init__(self, location, params):
+        options = {
+            'MAX_ENTRIES': self.default_max_entries,
+            **(params.get('OPTIONS') or {}),
+        }
+        super().__init__({**params, 'OPTIONS': options})
+        self._path = location
+        self._connection = None
+        self._writes = 0
+
+    @property
+    def _db(self):
+        if self._connection is None:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)'
+            )
+            self._connection = connection
+        return self._connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _row(self, value, timeout):
+        return (
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            self.get_backend_timeout(timeout),
+        )
+
+    def _wrote(self, count=1):
+        self._writes += count
+        if self._writes >= self.cull_every:
+            self._writes = 0
+            self._cull()
+
+    def _cull(self):
+        self._db.execute(
+            'DELETE FROM cache WHERE expires < ?', (time.time(),)
+        )
+        count = self._db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count > self._max_entries:
+            self._db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+    def get(self, key, default=None, version=None):
+        return self._get_many([key], version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        return self._get_many(keys, version)
+
+    def _get_many(self, keys, version):
+        keys = {self._key(key, version): key for key in keys}
+        found = {}
+        names = list(keys)
+        for i in range(0, len(names), 500):
+            chunk = names[i:i + 500]
+            rows = self._db.execute(
+                'SELECT key, value FROM cache WHERE key IN (%s) '
+                'AND (expires IS NULL OR expires > ?)'
+                % ', '.join('?' * len(chunk)),
+                (*chunk, time.time()),
+            )
+            for name, value in rows:
+                found[keys[name]] = pickle.loads(value)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._db.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            (self._key(key, version), *self._row(value, timeout)),
+        )
+        self._wrote()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        rows = [
+            (self._key(key, version), *self._row(value, timeout))
+            for key, value in data.items()
+        ]
+        with self._db:
+            self._db.execute('BEGIN')
+            self._db.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)',
+                rows,
+            )
+        self._wrote(len(rows))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        with self._db:
+            self._db.execute('BEGIN IMMEDIATE')
+            self._db.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, time.time()),
+            )
+            added = self._db.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)',
+                (key, *self._row(value, timeout)),
+            ).rowcount
+        self._wrote()
+        return bool(added)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return bool(self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), self._key(key, version),
+             time.time()),
+        ).rowcount)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        with self._db:
+            self._db.execute('BEGIN IMMEDIATE')
+            row = self._db.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            self._db.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key),
+            )
+        return value
+
+    def delete(self, key, version=None):
+        self._db.execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),)
+        )
+
+    def delete_many(self, keys, version=None):
+        with self._db:
+            self._db.execute('BEGIN')
+            self._db.executemany(
+                'DELETE FROM cache WHERE key = ?',
+                [(self._key(key, version),) for key in keys],
+            )
+
+    def has_key(self, key, version=None):
+        return self._db.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time()),
+        ).fetchone() is not None
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+
+class SQLiteCache(StatsMixin, SQLiteBaseCache):
+    pass
@@ -0,0 +1,102 @@
+"""
+Количество записей для паджинаторов без полного COUNT(*).
+
+На PostgreSQL COUNT(*) читает всю выборку, поэтому для больших
+выборок берется оценка планировщика: для неотфильтрованной таблицы —
+pg_class.reltuples, для остальных — число строк из EXPLAIN. Если
+оценка меньше COUNT_ESTIMATE_THRESHOLD (или база не PostgreSQL),
+выполняется точный COUNT(*).
+
+Результат кешируется на COUNT_CACHE_TIMEOUT с версией области
+'count:<таблица>' в ключе. Версию меняет сохранение или удаление
+записи моделей из COUNTED_MODELS (приемники подключает core.apps) и
+массовое создание в posts.bulk, так что после записи количество
+считается заново. Количества остальных моделей и изменения через
+queryset.update устаревают не дольше таймаута.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+
+from .cache import bump_versions, get_version_key
+
+CACHE_KEY = 'count:{}:{}'
+# поля, которые не входят в условия подсчитываемых выборок: сохранение
+# только их (update_last_login при каждом входе) версию не меняет
+UNCOUNTED_FIELDS = frozenset({'last_login'})
+
+
+def get_scope(model) -> str:
+    return f'count:{model._meta.db_table}'
+
+
+def _table_estimate(connection, model):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # -1 у таблицы, которую еще не анализировали
+    return row[0] if row and row[0] >= 0 else None
+
+
+def _plan_estimate(connection, sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimate_count(queryset):
+    """Оценка планировщика PostgreSQL или None, если ее нет."""
+    connection = connections[queryset.db]
+    query = queryset.query
+    if connection.vendor != 'postgresql' or not query.can_filter():
+        return None
+    if not query.where and not query.distinct:
+        return _table_estimate(connection, queryset.model)
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    return _plan_estimate(connection, sql, params)
+
+
+def _cache_key(queryset):
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    digest = hashlib.md5(
+        f'{queryset.db}\n{sql}\n{params!r}'.encode()
+    ).hexdigest()
+    version = get_version_key([get_scope(queryset.model)])
+    return CACHE_KEY.format(digest, version)
+
+
+def count(queryset) -> int:
+    """Количество записей queryset: оценка для больших, точное для малых."""
+    key = _cache_key(queryset)
+    if key is None:
+        return 0
+    result = cache.get(key)
+    if result is None:
+        result = estimate_count(queryset)
+        if result is None or result < settings.COUNT_ESTIMATE_THRESHOLD:
+            result = queryset.count()
+        cache.set(key, result, settings.COUNT_CACHE_TIMEOUT)
+    return result
+
+
+def table_changed(sender, raw=False, update_fields=None, **kwargs):
+    """Приемник post_save и post_delete моделей из COUNTED_MODELS."""
+    if raw or update_fields and update_fields <= UNCOUNTED_FIELDS:
+        return
+    bump_versions(get_scope(sender))
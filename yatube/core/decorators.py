@@ -0,0 +1,96 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+)
+from django.utils.http import http_date, urlencode
+
+from .cache import get_versions
+
+PAGE_KEY = 'page:{}'
+# параметры запроса, от которых зависят кешируемые страницы; остальные
+# не попадают в ключ, иначе произвольные строки запроса плодили бы
+# записи в кеше
+PAGE_QUERY_PARAMS = ('page', 'cursor', 'q')
+
+
+def anonymous_page_cache(get_scopes):
+    """
+    Кеш страниц целиком для анонимных GET-запросов.
+
+    get_scopes получает аргументы представления и возвращает области
+    кеша, от которых зависит страница (или None, если объекта нет —
+    тогда запрос уходит в представление как есть). ETag и
+    Last-Modified строятся по версиям областей, поэтому повторный
+    запрос браузера или nginx получает 304 без обращения к базе, а
+    ключ страницы в кеше включает путь, параметры из PAGE_QUERY_PARAMS
+    и версии.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+            ):
+                return view(request, *args, **kwargs)
+            scopes = get_scopes(*args, **kwargs)
+            if not scopes:
+                return view(request, *args, **kwargs)
+            versions = get_versions(scopes)
+            signature = '\n'.join([_page_path(request), *(
+                f'{scope}={versions[scope]}' for scope in scopes
+            )])
+            digest = hashlib.md5(signature.encode()).hexdigest()
+            etag = f'"{digest}"'
+            # версия — время изменения в микросекундах, Last-Modified
+            # округляется вверх до секунды
+            last_modified = -(-max(versions.values()) // 1000000)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = _cached_response(request, view, args, kwargs,
+                                            PAGE_KEY.format(digest))
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                response['Last-Modified'] = http_date(last_modified)
+                patch_cache_control(response, max_age=0, must_revalidate=True)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
+
+
+def _page_path(request):
+    """Путь страницы с параметрами, от которых зависит ее содержимое."""
+    params = [
+        (name, request.GET[name])
+        for name in PAGE_QUERY_PARAMS if name in request.GET
+    ]
+    return f'{request.path}?{urlencode(params)}'
+
+
+def _cached_response(request, view, args, kwargs, key):
+    cached = cache.get(key)
+    if cached is not None:
+        content, content_type = cached
+        return HttpResponse(content, content_type=content_type)
+    response = view(request, *args, **kwargs)
+    # страницы с токеном CSRF или куками относятся к одному посетителю
+    if (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_USED')
+    ):
+        cache.set(
+            key,
+            (response.content, response['Content-Type']),
+            settings.PAGE_CACHE_TIMEOUT,
+        )
+    return response
@@ -0,0 +1,56 @@
+"""
+Отметки записей, удаляемых в текущем потоке.
+
+Приемник pre_delete родителя отмечает его, чтобы приемники post_delete
+каскадно удаляемых потомков могли это учесть (например, не сдвигать
+счетчики по одной записи, если родитель уже сдвинул их пачкой).
+
+Отметки живут только внутри scope(): его открывают delete() моделей
+DeletionScopeModel и их queryset'ов. По выходу из самого внешнего
+scope() отметки стираются в finally, поэтому удаление, завершившееся
+ошибкой или откатом, не оставляет их потоку. Вне scope() отметить
+запись нельзя: mark возвращает False, и приемники обрабатывают
+потомков по одному.
+"""
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import models
+
+_local = threading.local()
+
+
+@contextmanager
+def scope():
+    _local.depth = getattr(_local, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _local.depth -= 1
+        if not _local.depth:
+            _local.marks = None
+
+
+def mark(kind, pk) -> bool:
+    """Отметить запись; False, если удаление идет вне scope()."""
+    if not getattr(_local, 'depth', 0):
+        return False
+    if getattr(_local, 'marks', None) is None:
+        _local.marks = defaultdict(set)
+    _local.marks[kind].add(pk)
+    return True
+
+
+def marked(kind) -> frozenset:
+    marks = getattr(_local, 'marks', None)
+    return frozenset(marks[kind]) if marks else frozenset()
+
+
+class DeletionScopeQuerySet(models.QuerySet):
+    def delete(self):
+        with scope():
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
@@ -0,0 +1,193 @@
+"""
+Производные размеры картинок.
+
+Все размеры, которые показывают шаблоны, описаны в DERIVATIVES и
+создаются сразу после загрузки файла, а не первым зрителем страницы.
+Файлы кладутся sorl.thumbnail в его каталог рядом с оригиналом, а
+сведения о них — в его хранилище ключей, поэтому шаблон находит
+готовую миниатюру, не открывая исходный файл.
+
+DerivativeResolver собирает миниатюры для всей страницы одним
+обращением к хранилищу ключей вместо отдельного запроса на каждую
+картинку (нужные для этого внутренности sorl скрыты в core.thumbnails),
+read_metadata — размеры, формат и превью для хранения в модели,
+make_variants — копии разной ширины в форматах WebP и AVIF
+для srcset.
+"""
+import base64
+import hashlib
+import logging
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import deserialize_image_file
+
+from . import thumbnails
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_SIZE = 16
+VARIANTS_DIR = 'variants'
+VARIANT_QUALITY = 80
+
+DERIVATIVES = {
+    'post': ('x300', {'crop': 'center', 'upscale': True}),
+    'avatar': ('32x32', {'crop': 'center'}),
+}
+
+
+def get_derivative(image, name):
+    """Миниатюра картинки заданного размера (создается при отсутствии)."""
+    if not image:
+        return None
+    geometry, options = DERIVATIVES[name]
+    try:
+        thumbnail = get_thumbnail(image, geometry, **options)
+    except Exception:
+        # как и тег {% thumbnail %}: битая картинка не ломает страницу
+        if thumbnail_settings.THUMBNAIL_DEBUG:
+            raise
+        logger.exception('Не удалось создать размер %s для %s', name, image)
+        return None
+    # без исходного файла sorl возвращает несозданную миниатюру без размера
+    return thumbnail if thumbnail.size else None
+
+
+def make_derivatives(image, names):
+    for name in names:
+        get_derivative(image, name)
+
+
+def get_variant_formats():
+    """Поддерживаемые Pillow форматы вариантов, предпочтительные первыми."""
+    Image.init()
+    return [fmt for fmt in ('AVIF', 'WEBP') if fmt in Image.SAVE]
+
+
+def make_variants(image, widths) -> list:
+    """
+    Копии картинки заданной ширины (не шире оригинала) во всех форматах
+    get_variant_formats.
+
+    Имя файла — хеш его содержимого, поэтому по одному адресу всегда
+    лежит один и тот же файл и его можно кешировать бессрочно.
+    """
+    formats = get_variant_formats()
+    variants = []
+    try:
+        image.seek(0)
+        with Image.open(image) as source:
+            has_alpha = (
+                source.mode in ('RGBA', 'LA') or 'transparency' in source.info
+            )
+            source = source.convert('RGBA' if has_alpha else 'RGB')
+        for width in sorted({min(width, source.width) for width in widths}):
+            height = max(round(source.height * width / source.width), 1)
+            resized = source.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                buffer = BytesIO()
+                resized.save(buffer, fmt, quality=VARIANT_QUALITY)
+                content = buffer.getvalue()
+                digest = hashlib.sha1(content).hexdigest()
+                name = f'{VARIANTS_DIR}/{digest[:2]}/{digest}.{fmt.lower()}'
+                if not image.storage.exists(name):
+                    name = image.storage.save(name, ContentFile(content))
+                variants.append({
+                    'format': fmt.lower(),
+                    'width': width,
+                    'height': height,
+                    'name': name,
+                })
+    except Exception:
+        if thumbnail_settings.THUMBNAIL_DEBUG:
+            raise
+        logger.exception('Не удалось создать варианты для %s', image)
+        return []
+    return variants
+
+
+def read_metadata(file) -> dict:
+    """
+    Ширина, высота, размер в байтах, формат и превью картинки.
+
+    Превью — data URI с картинкой не больше PLACEHOLDER_SIZE точек по
+    большей стороне, которую шаблон растягивает с размытием, пока не
+    загрузилась сама картинка.
+    """
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        image_format = image.format or ''
+        preview = image.convert('RGB')
+        preview.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+        buffer = BytesIO()
+        preview.save(buffer, 'JPEG', quality=50)
+    file.seek(0)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_size': file.size,
+        'image_format': image_format.lower(),
+        'image_placeholder': 'data:image/jpeg;base64,{}'.format(
+            base64.b64encode(buffer.getvalue()).decode()
+        ),
+    }
+
+
+EMPTY_METADATA = dict.fromkeys(
+    ('image_width', 'image_height', 'image_size')
+)
+EMPTY_METADATA.update(image_format='', image_placeholder='')
+
+
+class DerivativeResolver:
+    """
+    Миниатюры картинок страницы с запоминанием.
+
+    prefetch получает пары (картинка, размер) всей страницы и читает
+    их из хранилища ключей одним get_many; повторы (аватар одного автора
+    на многих карточках) запрашиваются один раз. Не найденные миниатюры
+    создаются в get, как в {% thumbnail %}.
+    """
+
+    def __init__(self):
+        self._resolved = {}
+
+    @classmethod
+    def for_request(cls, request):
+        """Один экземпляр на запрос."""
+        if request is None:
+            return cls()
+        resolver = getattr(request, '_derivative_resolver', None)
+        if resolver is None:
+            resolver = request._derivative_resolver = cls()
+        return resolver
+
+    def prefetch(self, pairs):
+        pending = {}
+        for image, name in pairs:
+            key = (image.name, name) if image else None
+            if key is None or key in self._resolved:
+                continue
+            geometry, options = DERIVATIVES[name]
+            thumbnail_name = thumbnails.get_thumbnail_name(
+                image, geometry, options
+            )
+            pending[thumbnails.get_store_key(thumbnail_name)] = key
+        if not pending:
+            return
+        values = thumbnails.get_many(list(pending))
+        for raw_key, key in pending.items():
+            if raw_key in values:
+                self._resolved[key] = deserialize_image_file(values[raw_key])
+
+    def get(self, image, name):
+        if not image:
+            return None
+        key = (image.name, name)
+        if key not in self._resolved:
+            self._resolved[key] = get_derivative(image, name)
+        return self._resolved[key]
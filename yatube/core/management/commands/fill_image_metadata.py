@@ -0,0 +1,61 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.models import ImageModel
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет размеры, формат и превью картинок, загруженных '
+        'до появления этих полей, и ставит в очередь создание их '
+        'размеров и вариантов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Количество записей, загружаемых за один запрос',
+        )
+
+    def handle(self, *args, **options):
+        for model in apps.get_models():
+            if issubclass(model, ImageModel):
+                filled, failed = self.fill(model, options['batch_size'])
+                self.stdout.write(
+                    f'{model._meta.verbose_name_plural}: заполнено '
+                    f'{filled}, не прочитано {failed}'
+                )
+
+    def fill(self, model, batch_size):
+        """
+        Проходит записи без метаданных пачками по первичному ключу;
+        файлы открываются по одному, в базу пишутся только новые поля.
+        Для заполненных записей ставится та же задача, что и для новых
+        загрузок: производные размеры и варианты создаст воркер.
+        """
+        queryset = model._default_manager.filter(
+            image_width__isnull=True
+        ).exclude(image='').exclude(image__isnull=True).only('pk', 'image')
+        filled = failed = 0
+        last_pk = None
+        while True:
+            batch = queryset.order_by('pk')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                return filled, failed
+            last_pk = batch[-1].pk
+            for instance in batch:
+                if not instance.update_image_metadata():
+                    failed += 1
+                    continue
+                model._default_manager.filter(pk=instance.pk).update(**{
+                    field: getattr(instance, field)
+                    for field in ImageModel.image_metadata_fields
+                })
+                instance.image.close()
+                instance.enqueue_image_derivatives()
+                filled += 1
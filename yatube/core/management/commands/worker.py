@@ -0,0 +1,81 @@
+import logging
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from core.queue import claim, execute, run_pending
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи фоновой очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Количество потоков, выполняющих задачи',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1,
+            help='Количество задач, которые поток берет за один раз',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            done = run_pending(options['batch_size'])
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        self.stopping = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: self.stopping.set())
+        threads = [
+            threading.Thread(
+                target=self.work,
+                args=(options['batch_size'], options['poll_interval']),
+                name=f'worker-{number}',
+            )
+            for number in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f'Воркер запущен, потоков: {len(threads)}')
+        for thread in threads:
+            # join с таймаутом, чтобы главный поток получал сигналы
+            while thread.is_alive():
+                thread.join(1)
+        self.stdout.write('Воркер остановлен')
+
+    def work(self, batch_size, poll_interval):
+        try:
+            while not self.stopping.is_set():
+                try:
+                    claimed = claim(batch_size)
+                except DatabaseError:
+                    # база недоступна: переподключиться на следующем круге
+                    logger.exception('Не удалось получить задачи')
+                    connection.close()
+                    claimed = []
+                if not claimed:
+                    self.stopping.wait(poll_interval)
+                for item in claimed:
+                    execute(item)
+        finally:
+            connection.close()
@@ -1,4 +1,15 @@
+import json
+import logging
+
 from django.db import models
+from django.utils import timezone
+
+from . import deletion
+from .images import (
+    EMPTY_METADATA, make_derivatives, make_variants, read_metadata,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class CreatedModel(models.Model):
@@ -10,3 +21,187 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class DeletionScopeModel(models.Model):
+    """
+    Модель, удаление которой открывает core.deletion.scope().
+    Менеджер модели должен строиться на DeletionScopeQuerySet.
+    """
+
+    class Meta:
+        abstract = True
+
+    def delete(self, *args, **kwargs):
+        with deletion.scope():
+            return super().delete(*args, **kwargs)
+
+
+class ImageModel(models.Model):
+    """
+    Модель с картинкой в поле image.
+
+    При загрузке нового файла в модели сохраняются его размеры, формат
+    и превью, чтобы не открывать файл при выводе, а фоновая задача
+    создает производные размеры, перечисленные в image_derivatives
+    (ключи core.images.DERIVATIVES), и варианты шириной
+    image_variant_widths для srcset.
+    """
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, blank=True, editable=False,
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, blank=True, editable=False,
+    )
+    image_size = models.PositiveIntegerField(
+        'Размер картинки, байт', null=True, blank=True, editable=False,
+    )
+    image_format = models.CharField(
+        'Формат картинки', max_length=10, blank=True, editable=False,
+    )
+    image_placeholder = models.TextField(
+        'Превью картинки', blank=True, editable=False,
+        help_text='data URI уменьшенной копии для показа до загрузки',
+    )
+    image_variants = models.TextField(
+        'Варианты картинки', blank=True, editable=False,
+        help_text='JSON со списком копий разной ширины и формата',
+    )
+
+    image_metadata_fields = tuple(EMPTY_METADATA)
+    image_derivatives = ()
+    image_variant_widths = ()
+
+    class Meta:
+        abstract = True
+
+    def update_image_metadata(self):
+        """Заполнить поля метаданных по файлу image."""
+        if not self.image:
+            metadata = EMPTY_METADATA
+        else:
+            try:
+                metadata = read_metadata(self.image)
+            except (OSError, ValueError):
+                logger.exception('Не удалось прочитать картинку %s',
+                                 self.image.name)
+                return False
+        for field, value in metadata.items():
+            setattr(self, field, value)
+        return True
+
+    def enqueue_image_derivatives(self):
+        """Поставить в очередь создание размеров и вариантов картинки."""
+        Task.objects.enqueue(
+            'core.tasks.make_image_derivatives',
+            self._meta.label, self.pk, self.image.name,
+        )
+
+    def make_image_derivatives(self):
+        """Создать размеры и варианты уже сохраненной картинки."""
+        make_derivatives(self.image, self.image_derivatives)
+        if self.image_variant_widths:
+            variants = make_variants(self.image, self.image_variant_widths)
+            self.image_variants = json.dumps(variants) if variants else ''
+            self.save(update_fields=['image_variants'])
+
+    def get_image_variants(self):
+        """Варианты картинки с адресами файлов."""
+        if not self.image_variants:
+            return []
+        variants = json.loads(self.image_variants)
+        for variant in variants:
+            variant['url'] = self.image.storage.url(variant['name'])
+        return variants
+
+    @property
+    def image_sources(self):
+        """Источники <picture>: тип и srcset для каждого формата."""
+        sources = {}
+        for variant in self.get_image_variants():
+            sources.setdefault(variant['format'], []).append(
+                '{url} {width}w'.format(**variant)
+            )
+        return [
+            {'type': f'image/{fmt}', 'srcset': ', '.join(srcset)}
+            for fmt, srcset in sources.items()
+        ]
+
+    def save(self, *args, **kwargs):
+        uploaded = bool(self.image) and not self.image._committed
+        if uploaded or (not self.image and self.image_width is not None):
+            self.update_image_metadata()
+            self.image_variants = ''
+        super().save(*args, **kwargs)
+        if uploaded:
+            self.enqueue_image_derivatives()
+
+
+class TaskManager(models.Manager):
+    def enqueue(self, name, *args, **kwargs):
+        """
+        Поставить задачу в очередь. Запись создается в текущей
+        транзакции, поэтому воркер увидит задачу только после ее
+        фиксации, а при откате задачи не будет вовсе.
+        """
+        return self.create(
+            name=name,
+            payload=json.dumps({'args': args, 'kwargs': kwargs}),
+        )
+
+
+class Task(CreatedModel):
+    name = models.CharField(
+        'Задача',
+        max_length=255,
+        help_text='Имя зарегистрированной функции core.queue',
+    )
+    payload = models.TextField(
+        'Аргументы',
+        help_text='JSON с позиционными и именованными аргументами',
+    )
+    attempts = models.PositiveIntegerField('Попытки', default=0)
+    run_at = models.DateTimeField(
+        'Запустить не раньше',
+        default=timezone.now,
+    )
+    locked_until = models.DateTimeField(
+        'Выполняется до',
+        null=True,
+        blank=True,
+        help_text='Срок, после которого задачу может взять другой воркер',
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    objects = TaskManager()
+
+    class Meta:
+        ordering = ['run_at', 'id']
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Очередь задач'
+        indexes = [
+            models.Index(name='task_run_at_idx', fields=['run_at', 'id']),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def get_arguments(self):
+        payload = json.loads(self.payload)
+        return payload['args'], payload['kwargs']
+
+
+class DeadTask(CreatedModel):
+    name = models.CharField('Задача', max_length=255)
+    payload = models.TextField('Аргументы')
+    attempts = models.PositiveIntegerField('Попытки')
+    error = models.TextField('Ошибка', blank=True)
+    task_created = models.DateTimeField('Поставлена в очередь')
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'Невыполненная задача'
+        verbose_name_plural = 'Невыполненные задачи'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,72 @@
+from django.db.migrations.operations import AddIndex
+
+
+def drop_invalid_index(schema_editor, name):
+    """
+    Удаляет индекс PostgreSQL, оставшийся в состоянии INVALID после
+    прерванного CREATE INDEX CONCURRENTLY, чтобы его можно было
+    построить заново.
+    """
+    quoted = schema_editor.quote_name(name)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT indisvalid FROM pg_index '
+            'WHERE indexrelid = to_regclass(%s)',
+            [quoted],
+        )
+        row = cursor.fetchone()
+    if row is not None and not row[0]:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {quoted}')
+
+
+class AddIndexConcurrently(AddIndex):
+    """
+    AddIndex, который на PostgreSQL строит индекс через
+    CREATE INDEX CONCURRENTLY, не блокируя запись в таблицу.
+
+    CONCURRENTLY не работает внутри транзакции, поэтому миграция с этой
+    операцией должна объявлять atomic = False. На остальных СУБД
+    индекс создается обычным образом.
+
+    Прерванное построение оставляет индекс в состоянии INVALID: такой
+    индекс удаляется и строится заново, а готовый не трогается
+    (IF NOT EXISTS), поэтому миграцию можно безопасно повторить.
+    """
+
+    def _concurrently(self, schema_editor):
+        return schema_editor.connection.vendor == 'postgresql'
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if not self._concurrently(schema_editor):
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            drop_invalid_index(schema_editor, self.index.name)
+            statement = self.index.create_sql(model, schema_editor)
+            statement.template = statement.template.replace(
+                'CREATE INDEX', 'CREATE INDEX CONCURRENTLY IF NOT EXISTS', 1
+            )
+            schema_editor.execute(statement)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if not self._concurrently(schema_editor):
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.execute(
+                'DROP INDEX CONCURRENTLY IF EXISTS %s'
+                % schema_editor.quote_name(self.index.name)
+            )
+
+    def describe(self):
+        return 'Concurrently create index %s on field(s) %s of model %s' % (
+            self.index.name,
+            ', '.join(self.index.fields),
+            self.model_name,
+        )
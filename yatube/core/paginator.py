@@ -0,0 +1,200 @@
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Page, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+
+from . import counting
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """В отличие от DjangoJSONEncoder не округляет время до миллисекунд."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage(Page):
+    """
+    Страница keyset-паджинатора.
+
+    Совместима с django.core.paginator.Page, но не знает ни номера
+    страницы, ни общего количества страниц: вместо них хранит курсоры
+    соседних страниц. Методы Page, которым нужна абсолютная позиция
+    (next_page_number, previous_page_number, start_index, end_index),
+    возвращают None.
+    """
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Keyset page of %s objects>' % len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def _no_position(self):
+        return None
+
+    next_page_number = previous_page_number = _no_position
+    start_index = end_index = _no_position
+
+
+class KeysetPaginator:
+    """
+    Паджинатор по ключу сортировки (keyset/seek pagination).
+
+    Вместо OFFSET страница выбирается условием по значениям ключа
+    последней показанной записи, поэтому любая страница стоит столько
+    же, сколько первая, а COUNT(*) не выполняется вовсе. Все поля
+    ordering сортируются в одном направлении, последнее поле должно
+    быть уникальным.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-created', '-id')):
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = tuple(field.lstrip('-') for field in self.ordering)
+        self.descending = self.ordering[0].startswith('-')
+        self.object_list = object_list
+
+    def encode_cursor(self, obj, reverse=False) -> str:
+        position = {
+            'v': [getattr(obj, field) for field in self.fields],
+            'r': reverse,
+        }
+        data = json.dumps(position, cls=CursorEncoder).encode()
+        return urlsafe_b64encode(data).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            data = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            position = json.loads(data.decode())
+            values = [
+                self._to_python(field, value)
+                for field, value in zip(self.fields, position['v'])
+            ]
+            reverse = bool(position['r'])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise InvalidCursor(cursor)
+        if len(values) != len(self.fields):
+            raise InvalidCursor(cursor)
+        return values, reverse
+
+    def _to_python(self, name, value):
+        try:
+            field = self.object_list.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+    def _seek(self, values, forward):
+        """Условие «строго после» (или «строго до») заданной позиции."""
+        lookup = 'lt' if self.descending == forward else 'gt'
+        conditions = []
+        for i, field in enumerate(self.fields):
+            condition = dict(zip(self.fields[:i], values[:i]))
+            condition[f'{field}__{lookup}'] = values[i]
+            conditions.append(Q(**condition))
+        return reduce(or_, conditions)
+
+    def _reversed_ordering(self):
+        return [
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        ]
+
+    def page(self, cursor=None) -> KeysetPage:
+        if not cursor:
+            return self._build(self.object_list.order_by(*self.ordering))
+        values, reverse = self.decode_cursor(cursor)
+        queryset = self.object_list.filter(self._seek(values, not reverse))
+        if reverse:
+            page = self._build(
+                queryset.order_by(*self._reversed_ordering()), reverse=True
+            )
+            return page if page.object_list else self.page()
+        return self._build(
+            queryset.order_by(*self.ordering), has_previous=True
+        )
+
+    def page_at(self, number) -> KeysetPage:
+        """
+        Страница по номеру для старых ссылок вида ?page=N.
+
+        Использует OFFSET, но не считает количество записей; навигация
+        с полученной страницы дальше идет по курсорам.
+        """
+        offset = (number - 1) * self.per_page
+        return self._build(
+            self.object_list.order_by(*self.ordering),
+            offset=offset,
+            has_previous=offset > 0,
+        )
+
+    def get_page(self, cursor=None, number=None) -> KeysetPage:
+        """Аналог Paginator.get_page: некорректный курсор — первая страница."""
+        try:
+            if cursor:
+                return self.page(cursor)
+            if number is not None:
+                return self.page_at(max(int(number), 1))
+        except (InvalidCursor, ValueError):
+            pass
+        return self.page()
+
+    def _build(self, queryset, offset=0, reverse=False, has_previous=False):
+        items = list(queryset[offset:offset + self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if reverse:
+            items.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next = has_more
+        return KeysetPage(
+            items,
+            self,
+            next_cursor=(
+                self.encode_cursor(items[-1]) if items and has_next else None
+            ),
+            previous_cursor=(
+                self.encode_cursor(items[0], reverse=True)
+                if items and has_previous else None
+            ),
+        )
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator, количество записей которого считает core.counting:
+    для больших выборок — оценка планировщика, а не COUNT(*).
+    Оценка приблизительна: последняя страница может оказаться пустой.
+    """
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            return counting.count(self.object_list)
+        return super().count
@@ -0,0 +1,155 @@
+"""
+Очередь фоновых задач в основной базе данных.
+
+Задача — функция, зарегистрированная декоратором task, с аргументами,
+которые сериализуются в JSON. Запрос только записывает строку в
+core.models.Task (task.enqueue или Task.objects.enqueue), а выполняет
+ее команда manage.py worker.
+
+Воркер берет задачу, продлевая ее блокировку locked_until: на
+PostgreSQL кандидаты выбираются SELECT ... FOR UPDATE SKIP LOCKED,
+на SQLite — опросом, а захват в обоих случаях подтверждается
+условным UPDATE, поэтому одну задачу не выполнят два воркера. Задача
+упавшего воркера снова становится доступна по истечении блокировки.
+Неудачная попытка повторяется с экспоненциальной задержкой, после
+max_attempts попыток задача переносится в core.models.DeadTask.
+Попыткой считается и захват, блокировка которого истекла (воркер упал
+или завис): задача, исчерпавшая попытки так, тоже переносится в
+DeadTask, а не выполняется снова.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import DeadTask, Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(func=None, *, name=None, max_attempts=None):
+    """
+    Зарегистрировать функцию как задачу:
+
+        @task
+        def send_email(...): ...
+
+        send_email.enqueue(...)
+    """
+    def decorator(func):
+        func.task_name = name or f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts or settings.TASK_MAX_ATTEMPTS
+        func.enqueue = lambda *args, **kwargs: Task.objects.enqueue(
+            func.task_name, *args, **kwargs
+        )
+        _registry[func.task_name] = func
+        return func
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def _ready(now):
+    return Task.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+        run_at__lte=now,
+    )
+
+
+def claim(batch_size=10):
+    """Взять до batch_size готовых к выполнению задач."""
+    now = timezone.now()
+    lease = {
+        'locked_until': now + timedelta(seconds=settings.TASK_LEASE),
+        'attempts': F('attempts') + 1,
+    }
+    candidates = _ready(now).order_by('run_at', 'id').values_list(
+        'pk', flat=True
+    )
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                candidates.select_for_update(skip_locked=True)[:batch_size]
+            )
+            Task.objects.filter(pk__in=ids).update(**lease)
+    else:
+        # без SKIP LOCKED кандидата мог уже забрать другой воркер:
+        # захват подтверждает условный UPDATE каждой задачи
+        ids = [
+            pk for pk in list(candidates[:batch_size])
+            if _ready(now).filter(pk=pk).update(**lease)
+        ]
+    return list(Task.objects.filter(pk__in=ids).order_by('run_at', 'id'))
+
+
+def get_retry_delay(attempts):
+    """Задержка перед следующей попыткой: TASK_RETRY_DELAY * 2^(n-1)."""
+    return min(
+        settings.TASK_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.TASK_RETRY_MAX_DELAY,
+    )
+
+
+def _bury(claimed, error):
+    with transaction.atomic():
+        DeadTask.objects.create(
+            name=claimed.name,
+            payload=claimed.payload,
+            attempts=claimed.attempts,
+            error=error,
+            task_created=claimed.created,
+        )
+        claimed.delete()
+
+
+def execute(claimed):
+    """Выполнить взятую задачу и записать результат."""
+    func = _registry.get(claimed.name)
+    if func is not None and claimed.attempts > func.max_attempts:
+        # предыдущие захваты закончились истечением блокировки
+        logger.error('Задача %s #%s: попытки исчерпаны',
+                     claimed.name, claimed.pk)
+        _bury(claimed, claimed.last_error or 'Истекла блокировка задачи')
+        return False
+    try:
+        if func is None:
+            raise LookupError(f'Задача {claimed.name} не зарегистрирована')
+        args, kwargs = claimed.get_arguments()
+        with transaction.atomic():
+            func(*args, **kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Задача %s #%s завершилась ошибкой',
+                         claimed.name, claimed.pk)
+        max_attempts = func.max_attempts if func else 1
+        if claimed.attempts >= max_attempts:
+            _bury(claimed, error)
+            return False
+        Task.objects.filter(pk=claimed.pk).update(
+            locked_until=None,
+            last_error=error,
+            run_at=timezone.now() + timedelta(
+                seconds=get_retry_delay(claimed.attempts)
+            ),
+        )
+        return False
+    Task.objects.filter(pk=claimed.pk).delete()
+    return True
+
+
+def run_pending(batch_size=10):
+    """Выполнять задачи, пока есть готовые; вернуть их количество."""
+    done = 0
+    while True:
+        claimed = claim(batch_size)
+        if not claimed:
+            return done
+        for item in claimed:
+            execute(item)
+            done += 1
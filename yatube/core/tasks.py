@@ -0,0 +1,12 @@
+from django.apps import apps
+
+from .queue import task
+
+
+@task
+def make_image_derivatives(model, pk, image_name):
+    """Размеры и варианты загруженной картинки core.models.ImageModel."""
+    instance = apps.get_model(model)._default_manager.filter(pk=pk).first()
+    # картинку могли заменить или удалить, пока задача ждала в очереди
+    if instance is not None and instance.image.name == image_name:
+        instance.make_image_derivatives()
@@ -0,0 +1,20 @@
+from django import template
+
+from ..images import DerivativeResolver
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def derivative(context, image, name):
+    """
+    Готовый размер картинки из core.images.DERIVATIVES:
+    {% derivative post.image 'post' as im %}.
+
+    Берется из DerivativeResolver контекста (derivatives) или запроса,
+    поэтому заранее выбранные миниатюры не запрашиваются повторно.
+    """
+    resolver = context.get('derivatives') or DerivativeResolver.for_request(
+        context.get('request')
+    )
+    return resolver.get(image, name)
@@ -0,0 +1,217 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+import sorl
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.images import deserialize_image_file
+
+from . import counting, thumbnails
+from .images import DERIVATIVES
+from .cache import get_versions
+from .cache_backends import SQLiteCache
+from .models import DeadTask, Task
+from .paginator import EstimatedCountPaginator
+from .queue import claim, run_pending, task
+
+calls = []
+
+
+@task(max_attempts=2)
+def remember(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def fail():
+    raise ValueError('ошибка')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = SQLiteCache(
+            os.path.join(self.directory, 'cache.sqlite3'), {}
+        )
+        self.other_worker = SQLiteCache(
+            os.path.join(self.directory, 'cache.sqlite3'), {}
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_values_are_shared_between_connections(self):
+        """Запись одного воркера видна другому воркеру."""
+        self.cache.set_many({'a': 1, 'b': [2]})
+        self.assertEqual(
+            self.other_worker.get_many(['a', 'b', 'c']), {'a': 1, 'b': [2]}
+        )
+        self.other_worker.delete('a')
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_add_and_incr(self):
+        """add не перезаписывает живой ключ, incr атомарно увеличивает."""
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertFalse(self.other_worker.add('counter', 10))
+        self.assertEqual(self.other_worker.incr('counter', 2), 3)
+        self.assertEqual(self.cache.get('counter'), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_zero_timeout_is_not_stored(self):
+        self.cache.set('key', 'value', 0)
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_hit_and_miss_stats(self):
+        """Попадания и промахи суммируются по всем воркерам."""
+        self.cache.set('key', 'value')
+        self.cache.get('key')
+        self.cache.get_many(['key', 'missing'])
+        self.other_worker.get('missing')
+        self.cache.flush_stats()
+        self.assertEqual(
+            self.other_worker.get_stats(), {'hits': 2, 'misses': 2}
+        )
+
+
+@override_settings(TASK_RETRY_DELAY=60)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_worker_runs_ready_tasks(self):
+        remember.enqueue('first')
+        remember.enqueue(value='second')
+        later = remember.enqueue('later')
+        Task.objects.filter(pk=later.pk).update(
+            run_at=timezone.now() + timedelta(hours=1)
+        )
+        out = StringIO()
+        call_command('worker', once=True, stdout=out)
+        self.assertEqual(calls, ['first', 'second'])
+        self.assertIn('Выполнено задач: 2', out.getvalue())
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_claimed_task_is_not_claimed_twice(self):
+        remember.enqueue('once')
+        self.assertEqual(len(claim()), 1)
+        self.assertEqual(claim(), [])
+
+    def test_failed_task_is_retried_and_buried(self):
+        """Ошибка откладывает задачу, последняя попытка — в DeadTask."""
+        fail.enqueue()
+        run_pending()
+        queued = Task.objects.get()
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('ValueError', queued.last_error)
+        self.assertGreater(
+            queued.run_at, timezone.now() + timedelta(seconds=50)
+        )
+        Task.objects.update(run_at=timezone.now())
+        run_pending()
+        self.assertFalse(Task.objects.exists())
+        dead = DeadTask.objects.get()
+        self.assertEqual((dead.name, dead.attempts), (fail.task_name, 2))
+
+    def test_expired_leases_count_as_attempts(self):
+        """Задача, воркер которой падал max_attempts раз, не выполняется."""
+        remember.enqueue('crash')
+        for _ in range(2):
+            self.assertEqual(len(claim()), 1)
+            Task.objects.update(locked_until=timezone.now())
+        run_pending()
+        self.assertEqual(calls, [])
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(DeadTask.objects.get().attempts, 3)
+
+
+class CountingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for name in ('a', 'b', 'c'):
+            Task.objects.create(name=name, run_at=timezone.now())
+
+    def test_count_is_cached_until_write(self):
+        queryset = Task.objects.filter(name__in=['a', 'b'])
+        self.assertEqual(counting.count(queryset), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(counting.count(queryset), 2)
+        self.assertEqual(counting.count(Task.objects.all()), 3)
+        Task.objects.create(name='a', run_at=timezone.now())
+        self.assertEqual(counting.count(queryset), 2)
+        # приемник, который core.apps подключает к COUNTED_MODELS
+        counting.table_changed(Task)
+        self.assertEqual(counting.count(queryset), 3)
+        self.assertEqual(counting.count(Task.objects.none()), 0)
+
+    def test_login_keeps_user_count(self):
+        """Вход сохраняет только last_login и не сбрасывает количество."""
+        user = get_user_model().objects.create_user(username='counted')
+        scope = counting.get_scope(get_user_model())
+        version = get_versions([scope])[scope]
+        update_last_login(None, user)
+        self.assertEqual(get_versions([scope])[scope], version)
+        user.save()
+        self.assertNotEqual(get_versions([scope])[scope], version)
+
+    def test_paginator(self):
+        paginator = EstimatedCountPaginator(Task.objects.order_by('pk'), 2)
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
+        self.assertEqual(EstimatedCountPaginator([1, 2, 3], 2).count, 3)
+
+
+class ThumbnailAdapterTest(TestCase):
+    """core.thumbnails совпадает с установленной версией sorl."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.media = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def save_image(self, name, image_format):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 20), 'red').save(buffer, image_format)
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def test_version_is_pinned(self):
+        self.assertEqual(sorl.__version__, thumbnails.SORL_VERSION)
+
+    def test_names_and_store_match_get_thumbnail(self):
+        for image_name, image_format in (
+            ('adapter.jpg', 'JPEG'), ('adapter.png', 'PNG'),
+        ):
+            image = self.save_image(image_name, image_format)
+            for geometry, options in DERIVATIVES.values():
+                with self.subTest(image=image, geometry=geometry):
+                    thumbnail = get_thumbnail(image, geometry, **options)
+                    name = thumbnails.get_thumbnail_name(
+                        image, geometry, options
+                    )
+                    self.assertEqual(name, thumbnail.name)
+                    key = thumbnails.get_store_key(name)
+                    stored = thumbnails.get_many([key])
+                    self.assertEqual(
+                        deserialize_image_file(stored[key]).size,
+                        thumbnail.size,
+                    )
@@ -0,0 +1,77 @@
+"""
+Адаптер к внутренностям sorl.thumbnail.
+
+Пакетное чтение миниатюр (core.images.DerivativeResolver) опирается
+на то, чего нет в публичном API sorl: имя файла миниатюры и формат
+записей его хранилища ключей. Все такие обращения собраны здесь;
+остальной код пользуется только get_thumbnail и ImageFile.
+
+Написано под версию из requirements.txt (SORL_VERSION). Тест
+core.tests.ThumbnailAdapterTest сверяет имена, вычисленные здесь, с
+тем, что создает get_thumbnail, поэтому при обновлении sorl
+расхождение сразу обнаружится.
+"""
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as thumbnail_defaults
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    EMPTY_VALUE, KVStore as CachedDbKVStore,
+)
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+SORL_VERSION = '12.7.0'
+
+
+def get_thumbnail_name(image, geometry, options) -> str:
+    """
+    Имя файла миниатюры без обращения к хранилищам: параметры
+    дополняются так же, как в ThumbnailBackend.get_thumbnail.
+    """
+    backend = default.backend
+    options = dict(options)
+    source = ImageFile(image)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(thumbnail_defaults, attr):
+            options.setdefault(key, value)
+    return backend._get_thumbnail_filename(source, geometry, options)
+
+
+def get_store_key(name) -> str:
+    """Ключ записи о миниатюре в хранилище ключей sorl."""
+    return add_prefix(ImageFile(name, default.storage).key)
+
+
+def get_many(keys) -> dict:
+    """
+    Сериализованные записи хранилища ключей sorl пачкой: для
+    cached_db — кеш, затем один запрос к базе, для остальных
+    хранилищ — по одному чтению на ключ.
+    """
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDbKVStore):
+        values = {key: kvstore._get_raw(key) for key in keys}
+        return {key: value for key, value in values.items() if value}
+    values = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        stored = dict(
+            KVStoreModel.objects.filter(key__in=missing).values_list(
+                'key', 'value'
+            )
+        )
+        fetched = {key: stored.get(key, EMPTY_VALUE) for key in missing}
+        kvstore.cache.set_many(
+            fetched, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+        )
+        values.update(fetched)
+    return {
+        key: value for key, value in values.items()
+        if value != EMPTY_VALUE
+    }
@@ -1,8 +1,51 @@
 from django.conf import settings
-from django.core.paginator import Page, Paginator
+from django.core.paginator import Page
+from django.db.models.query import QuerySet
 
+from .cache import get_version_key
+from .paginator import EstimatedCountPaginator, KeysetPaginator
 
-def get_page_obj(request, obj_list) -> Page:
-    paginator = Paginator(obj_list, settings.ITEMS_PER_PAGE)
+
+def get_page_obj(request, obj_list, ordering=('-created', '-id')) -> Page:
+    if settings.KEYSET_PAGINATION and isinstance(obj_list, QuerySet):
+        paginator = KeysetPaginator(
+            obj_list, settings.ITEMS_PER_PAGE, ordering
+        )
+        return paginator.get_page(
+            request.GET.get('cursor'), request.GET.get('page')
+        )
+    paginator = EstimatedCountPaginator(obj_list, settings.ITEMS_PER_PAGE)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def get_comments_page(request, post) -> Page:
+    """
+    Страница комментариев поста, новые сначала. Всегда по курсору:
+    за запрос читается не больше COMMENTS_PER_PAGE + 1 комментариев.
+    """
+    paginator = KeysetPaginator(
+        post.comments.select_related('author'), settings.COMMENTS_PER_PAGE
+    )
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+def get_fragment_cache(request, *scopes) -> dict:
+    """
+    Параметры {% cache %} для фрагмента ленты: версия областей и
+    признак fragment_cached. Кешируются только первые страницы, чтобы
+    число ключей не росло вместе с числом курсоров; для остальных
+    шаблон обходит блок {% cache %} целиком.
+    """
+    page = request.GET.get('page') or '1'
+    cached = (
+        not request.GET.get('cursor')
+        and page.isdigit()
+        and int(page) <= settings.FRAGMENT_CACHE_PAGES
+    )
+    return {
+        'fragment_version': get_version_key(scopes),
+        'fragment_page': page,
+        'fragment_cached': cached,
+        'fragment_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+    }
@@ -1,6 +1,8 @@
+from core.paginator import EstimatedCountPaginator
 from django.contrib import admin
 
-from .models import Group, Post
+from .models import Comment, Group, Post
+from .search import search_posts
 
 
 @admin.register(Post)
@@ -12,9 +14,38 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'group',
     )
-    list_editable = ('group', )
+    list_select_related = ('author', 'group')
     search_fields = ('text', )
     list_filter = ('created', 'group', )
+    autocomplete_fields = ('author', 'group')
+    date_hierarchy = 'created'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по полнотекстовому индексу, а не LIKE по всей таблице."""
+        if not search_term:
+            return queryset, False
+        return search_posts(search_term, queryset), False
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'text',
+        'created',
+        'author',
+        'post',
+    )
+    list_select_related = ('author', 'post')
+    # префиксный поиск по индексу users.0006_username_prefix_index
+    search_fields = ('^author__username', )
+    autocomplete_fields = ('author', 'post')
+    date_hierarchy = 'created'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
 
@@ -27,4 +58,6 @@ class GroupAdmin(admin.ModelAdmin):
         'description',
     )
     search_fields = ('title', 'description',)
+    # порядок нужен паджинатору autocomplete_fields
+    ordering = ('title',)
     empty_value_display = '-пусто-'
@@ -0,0 +1,234 @@
+"""
+Автодополнение имен пользователей и адресов сообществ по префиксу.
+
+Результаты упорядочены по весу: пользователи — по числу подписчиков,
+сообщества — по числу постов, при равном весе — по алфавиту.
+
+Каждый процесс держит в памяти отсортированный по ключу массив и
+находит диапазон префикса двоичным поиском, не обращаясь к базе.
+Актуальность проверяется по версиям областей кеша (core.cache) при
+каждом поиске: сигналы меняют версию '<name>:append' при создании
+записи — тогда процесс догружает только записи с pk больше последнего
+загруженного — и '<name>:rebuild' при переименовании или удалении —
+тогда массив загружается заново. Веса обновляются при полной загрузке,
+которая выполняется и просто раз в AUTOCOMPLETE_REFRESH_INTERVAL
+секунд. Запись, зафиксированная позже записи с большим pk, попадет
+в массив при следующей полной загрузке.
+
+Полная загрузка идет в фоновом потоке и не задерживает запросы: пока
+она не закончилась, поиск отвечает по прежнему массиву, а если его
+еще нет — запросом к базе. Если записей больше
+AUTOCOMPLETE_MEMORY_LIMIT, массив не строится и поиск всегда идет в
+базу: префиксный индекс выбирает диапазон префикса, который затем
+сортируется по весу. Для имен пользователей индекс создает миграция
+users.0006_username_prefix_index, для адресов сообществ подходит
+индекс *_like, который Django строит для SlugField.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+
+from core import counting
+from core.cache import bump_versions, get_versions
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce, Lower
+
+from .models import Group, User
+
+# больше любого символа ключа: граница диапазона префикса в массиве
+KEY_MAX = chr(0x10FFFF)
+
+
+class PrefixIndex:
+    """Отсортированный массив (ключ, pk, вес, результат) одной модели."""
+
+    # полная загрузка в фоновом потоке; тесты загружают синхронно
+    background = True
+
+    def __init__(self, name, queryset, key_field, result_fields, rank,
+                 lookup='istartswith'):
+        self.name = name
+        self.queryset = queryset
+        self.key_field = key_field
+        self.lookup = lookup
+        self.result_fields = result_fields
+        self.rank = rank
+        self._lock = threading.Lock()
+        self._items = None
+        self._versions = None
+        self._last_pk = 0
+        self._loaded_at = None
+        self._loading = False
+
+    @property
+    def scopes(self):
+        return (f'{self.name}:append', f'{self.name}:rebuild')
+
+    def _ranked(self, queryset):
+        return queryset.annotate(autocomplete_rank=self.rank)
+
+    def _rows(self, queryset):
+        for row in self._ranked(queryset).values(
+            'pk', self.key_field, 'autocomplete_rank', *self.result_fields
+        ):
+            result = {field: row[field] for field in self.result_fields}
+            yield (
+                row[self.key_field].lower(), row['pk'],
+                row['autocomplete_rank'], result,
+            )
+
+    def _load(self, versions):
+        """Загружает массив заново и подменяет им текущий."""
+        limit = settings.AUTOCOMPLETE_MEMORY_LIMIT
+        items, last_pk = None, 0
+        # оценка из core.counting не загружает выборку, которая заведомо
+        # не поместится в память
+        if counting.count(self.queryset) <= limit:
+            rows = list(self._rows(self.queryset.order_by('pk')[:limit + 1]))
+            if len(rows) <= limit:
+                last_pk = max((pk for _, pk, _, _ in rows), default=0)
+                rows.sort(key=lambda row: (row[0], row[1]))
+                items = rows
+        with self._lock:
+            self._items, self._last_pk = items, last_pk
+            # версии прочитаны до загрузки: изменения, сделанные во время
+            # нее, подхватит следующий поиск
+            self._versions = versions
+            self._loaded_at = time.monotonic()
+
+    def _reload(self, versions):
+        try:
+            self._load(versions)
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def _reload_in_thread(self, versions):
+        try:
+            self._reload(versions)
+        finally:
+            # у потока свое соединение с базой
+            connection.close()
+
+    def _append(self, last_pk):
+        """
+        Догружает записи с pk больше last_pk. Запрос выполняется без
+        блокировки, под ней записи только вставляются в массив; уже
+        вставленные другим потоком или полной загрузкой пропускаются.
+        """
+        rows = list(self._rows(
+            self.queryset.filter(pk__gt=last_pk).order_by('pk')
+        ))
+        with self._lock:
+            if self._items is None:
+                return
+            for row in rows:
+                if row[1] > self._last_pk:
+                    insort(self._items, row)
+                    self._last_pk = row[1]
+            if len(self._items) > settings.AUTOCOMPLETE_MEMORY_LIMIT:
+                # массив, переросший лимит, от новых записей не уменьшится
+                self._items = None
+
+    def clear(self):
+        """Забыть массив: следующий поиск загрузит его заново."""
+        with self._lock:
+            self._items = self._versions = self._loaded_at = None
+            self._last_pk = 0
+
+    def _is_stale(self):
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at
+            > settings.AUTOCOMPLETE_REFRESH_INTERVAL
+        )
+
+    def refresh(self):
+        """Привести массив в соответствие с версиями областей."""
+        versions = get_versions(self.scopes)
+        with self._lock:
+            if self._loading:
+                return
+            previous = self._versions
+            rebuild = f'{self.name}:rebuild'
+            if (
+                previous is None or previous[rebuild] != versions[rebuild]
+                or self._is_stale()
+            ):
+                self._loading = True
+                last_pk = None
+            else:
+                self._versions = versions
+                if previous == versions or self._items is None:
+                    return
+                last_pk = self._last_pk
+        if last_pk is not None:
+            self._append(last_pk)
+            return
+        if not self.background:
+            self._reload(versions)
+            return
+        threading.Thread(
+            target=self._reload_in_thread, args=(versions,), daemon=True
+        ).start()
+
+    def _search_database(self, prefix, limit):
+        queryset = self._ranked(self.queryset.filter(**{
+            f'{self.key_field}__{self.lookup}': prefix
+        })).order_by('-autocomplete_rank', Lower(self.key_field), 'pk')
+        return list(queryset.values(*self.result_fields)[:limit])
+
+    def search(self, prefix, limit) -> list:
+        prefix = prefix.lower()
+        if not prefix:
+            return []
+        self.refresh()
+        items = self._items
+        if items is None:
+            return self._search_database(prefix, limit)
+        start = bisect_left(items, (prefix,))
+        end = bisect_left(items, (prefix + KEY_MAX,), start)
+        top = heapq.nsmallest(
+            limit,
+            (items[i] for i in range(start, end)),
+            key=lambda item: (-item[2], item[0], item[1]),
+        )
+        return [result for _, _, _, result in top]
+
+
+users = PrefixIndex(
+    'autocomplete-users',
+    User.objects.filter(is_active=True),
+    'username',
+    ('username', 'first_name', 'last_name'),
+    rank=Coalesce('stats__followers_count', Value(0)),
+)
+groups = PrefixIndex(
+    'autocomplete-groups',
+    Group.objects.all(),
+    'slug',
+    ('slug', 'title'),
+    rank=Count('posts'),
+    # адреса в нижнем регистре: без UPPER подходит индекс Django *_like
+    lookup='startswith',
+)
+
+
+def autocomplete(prefix, limit=None) -> dict:
+    """Первые по весу limit пользователей и сообществ на prefix."""
+    limit = limit or settings.AUTOCOMPLETE_LIMIT
+    return {
+        'users': users.search(prefix, limit),
+        'groups': groups.search(prefix, limit),
+    }
+
+
+def record_added(index):
+    bump_versions(f'{index.name}:append')
+
+
+def record_changed(index):
+    bump_versions(f'{index.name}:rebuild')
@@ -0,0 +1,83 @@
+"""
+Массовое создание постов и комментариев.
+
+bulk_create не вызывает save() и сигналы, поэтому то, что сигналы
+делают для одной записи, здесь выполняется один раз на всю пачку:
+счетчики сдвигаются одним UPDATE на автора или пост, посты
+раскладываются по лентам подписчиков общим bulk_create, а версии
+областей кеша меняются одним обращением к кешу.
+"""
+from collections import Counter, defaultdict
+
+from core import counting
+from core.cache import bump_versions
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from . import counters, timeline
+from .models import AuthorStats, Comment, Post
+
+
+def _insert(model, objs):
+    """
+    bulk_create, после которого у объектов заполнены pk. Вызывается
+    в транзакции.
+    """
+    objs = model.objects.bulk_create(
+        objs, batch_size=settings.BULK_CREATE_BATCH_SIZE
+    )
+    if connection.features.can_return_ids_from_bulk_insert or not objs:
+        return objs
+    # SQLite не возвращает id из многострочного INSERT. С первого INSERT
+    # до конца транзакции другие соединения в базу не пишут, а
+    # AUTOINCREMENT выдает id по порядку вставки, поэтому id пачки —
+    # последние len(objs) id таблицы
+    pks = list(model.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    )[:len(objs)])
+    for obj, pk in zip(objs, reversed(pks)):
+        obj.pk = pk
+        obj._state.adding = False
+        obj._state.db = model.objects.db
+    return objs
+
+
+@transaction.atomic
+def create_posts(posts):
+    """Сохранить новые посты без картинок."""
+    posts = _insert(Post, list(posts))
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    for author_id, authored in by_author.items():
+        # как counters.post_added: новые посты — самые поздние у автора
+        last_post_at = max(post.created for post in authored)
+        AuthorStats.objects.filter(pk=author_id).update(
+            posts_count=F('posts_count') + len(authored),
+            last_post_at=last_post_at,
+        )
+    timeline.fan_out_many(posts)
+    scopes = {counting.get_scope(Post)}
+    for post in posts:
+        post.loaded_group_id = post.group_id
+        scopes.update(post.get_cache_scopes())
+    bump_versions(*scopes)
+    return posts
+
+
+@transaction.atomic
+def create_comments(comments):
+    """Сохранить новые комментарии."""
+    comments = _insert(Comment, list(comments))
+    for post_id, count in Counter(c.post_id for c in comments).items():
+        counters.change_comments_count(post_id, count)
+    for author_id, count in Counter(c.author_id for c in comments).items():
+        counters.change_author_stats(author_id, comments_count=count)
+    scopes = {counting.get_scope(Comment)}
+    for post in Post.objects.filter(
+        pk__in={comment.post_id for comment in comments}
+    ).only('pk', 'author', 'group'):
+        scopes.update(post.get_cache_scopes())
+    bump_versions(*scopes)
+    return comments
@@ -0,0 +1,121 @@
+"""
+Денормализованные счетчики.
+
+Счетчики меняются атомарными UPDATE ... SET x = x + n, поэтому
+конкурирующие записи не теряют инкременты. Уменьшение ограничено
+нулем: записи, добавленные мимо сигналов (bulk_create, loaddata), не
+увеличили счетчик, и их удаление не должно падать на ограничении
+PositiveIntegerField. Накопившиеся расхождения исправляет команда
+repair_counters.
+"""
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import AuthorStats, Comment, Follow, Post
+
+
+def change_comments_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=Greatest(F('comments_count') + delta, 0)
+    )
+
+
+def change_author_stats(user_id, **deltas):
+    """Сдвигает счетчики статистики автора: posts_count=1, ..."""
+    AuthorStats.objects.filter(pk=user_id).update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+
+
+def post_added(post):
+    AuthorStats.objects.filter(pk=post.author_id).update(
+        posts_count=F('posts_count') + 1,
+        last_post_at=post.created,
+    )
+
+
+def post_removed(post):
+    last_post_at = Post.objects.filter(author=post.author_id).aggregate(
+        last=Max('created')
+    )['last']
+    AuthorStats.objects.filter(pk=post.author_id).update(
+        posts_count=Greatest(F('posts_count') - 1, 0),
+        last_post_at=last_post_at,
+    )
+
+
+def comments_removed_with_post(post_id):
+    """
+    Счетчики авторов комментариев удаляемого поста: по одному UPDATE на
+    автора, а не на комментарий. Счетчик самого поста не нужен.
+    """
+    by_author = Comment.objects.filter(post=post_id).order_by().values(
+        'author'
+    ).annotate(count=Count('pk')).values_list('author', 'count')
+    for author_id, count in by_author:
+        change_author_stats(author_id, comments_count=-count)
+
+
+def comments_removed_with_author(user_id) -> list:
+    """
+    Счетчики постов, которые прокомментировал удаляемый пользователь:
+    по одному UPDATE на пост. Его собственные посты удаляются вместе с
+    ним. Возвращает id измененных постов.
+    """
+    by_post = Comment.objects.filter(author=user_id).exclude(
+        post__author=user_id
+    ).order_by().values('post').annotate(count=Count('pk')).values_list(
+        'post', 'count'
+    )
+    post_ids = []
+    for post_id, count in by_post:
+        change_comments_count(post_id, -count)
+        post_ids.append(post_id)
+    return post_ids
+
+
+def get_author_stats(user) -> AuthorStats:
+    """
+    Статистика автора. Пользователям, созданным без сигнала post_save
+    (bulk_create, loaddata), она создается здесь с пересчитанными
+    значениями.
+    """
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        pass
+    stats, created = AuthorStats.objects.get_or_create(user=user)
+    if created:
+        AuthorStats.objects.filter(pk=user.pk).update(**actual_author_stats())
+        stats.refresh_from_db()
+    user.stats = stats
+    return stats
+
+
+def _count_by(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+def actual_comments_count():
+    """Выражение с фактическим количеством комментариев поста."""
+    return _count_by(Comment, 'post')
+
+
+def actual_author_stats():
+    """Выражения с фактическими значениями полей AuthorStats."""
+    return {
+        'posts_count': _count_by(Post, 'author'),
+        'comments_count': _count_by(Comment, 'author'),
+        'followers_count': _count_by(Follow, 'author'),
+        'following_count': _count_by(Follow, 'user'),
+        'last_post_at': Subquery(
+            Post.objects.filter(author=OuterRef('pk')).order_by().values(
+                'author'
+            ).annotate(last=Max('created')).values('last')
+        ),
+    }
@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from posts import timeline
+from posts.models import Comment, Follow, Post, TimelineEntry
+
+
+def hot_queries():
+    """
+    Запросы горячих страниц в том виде, в каком их строят представления
+    и паджинатор, и индексы, которые они должны использовать.
+    """
+    page = settings.ITEMS_PER_PAGE + 1
+    ordering = ('-created', '-id')
+    post = Post.objects.order_by().first()
+    group_post = Post.objects.filter(group__isnull=False).order_by().first()
+    follow = Follow.objects.order_by().first()
+    entry = TimelineEntry.objects.order_by().first()
+    queries = [(
+        'index',
+        Post.objects.select_related('author', 'group').order_by(
+            *ordering
+        )[:page],
+        'post_created_idx',
+    )]
+    if post is not None:
+        queries += [(
+            'profile',
+            Post.objects.filter(author=post.author_id).order_by(
+                *ordering
+            )[:page],
+            'post_author_created_idx',
+        ), (
+            'post_detail comments',
+            Comment.objects.filter(post=post).order_by(*ordering)[:page],
+            'comment_post_created_idx',
+        )]
+    if group_post is not None:
+        queries.append((
+            'group_list',
+            Post.objects.filter(group=group_post.group_id).order_by(
+                *ordering
+            )[:page],
+            'post_group_created_idx',
+        ))
+    if entry is not None:
+        queries.append((
+            'follow_index',
+            timeline.get_materialized_feed(entry.user_id).select_related(
+                'author', 'group'
+            ).order_by(*timeline.FEED_ORDERING)[:page],
+            'timeline_user_created_idx',
+        ))
+    if follow is not None:
+        queries.append((
+            'followers',
+            Follow.objects.filter(author=follow.author_id).values('user'),
+            'follow_author_user_idx',
+        ))
+    return queries
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет, что планы запросов горячих страниц используют '
+        'предназначенные для них индексы'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Выводить планы запросов целиком',
+        )
+        parser.add_argument(
+            '--no-seqscan',
+            action='store_true',
+            help=(
+                'Запретить PostgreSQL последовательное чтение: на почти '
+                'пустых таблицах (например, в тестах) иначе планировщик '
+                'не выбирает индексы'
+            ),
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        if options['no_seqscan'] and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # действует до конца транзакции команды
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        missing = []
+        for name, queryset, index in hot_queries():
+            plan = queryset.explain()
+            if options['verbose_plans']:
+                self.stdout.write(plan)
+            if index in plan:
+                self.stdout.write(f'{name}: {index}')
+            else:
+                missing.append(name)
+                self.stderr.write(f'{name}: индекс {index} не используется')
+        if missing:
+            raise CommandError(
+                'Планы запросов не используют индексы: ' + ', '.join(missing)
+            )
@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from posts import timeline
+from posts.counters import actual_author_stats, actual_comments_count
+from posts.models import AuthorStats, Post, User
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счетчики и исправляет расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество записей, проверяемых за один запрос',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fixed = self.repair_comments_count(batch_size)
+        self.stdout.write(f'Исправлено счетчиков комментариев: {fixed}')
+        fixed = self.repair_author_stats(batch_size)
+        self.stdout.write(f'Исправлено записей статистики авторов: {fixed}')
+        fixed = self.repair_celebrities()
+        self.stdout.write(f'Переключено режимов ленты авторов: {fixed}')
+
+    def batches(self, queryset, batch_size):
+        """Первичные ключи записей пачками по возрастанию."""
+        last_pk = None
+        while True:
+            if last_pk is not None:
+                queryset = queryset.filter(pk__gt=last_pk)
+            pks = list(
+                queryset.order_by('pk').values_list('pk', flat=True)[
+                    :batch_size
+                ]
+            )
+            if not pks:
+                return
+            last_pk = pks[-1]
+            yield pks
+
+    def repair_comments_count(self, batch_size):
+        fixed = 0
+        for ids in self.batches(Post.objects.all(), batch_size):
+            drifted = Post.objects.filter(id__in=ids).annotate(
+                actual=actual_comments_count()
+            ).exclude(comments_count=F('actual')).values_list('id', flat=True)
+            fixed += Post.objects.filter(id__in=list(drifted)).update(
+                comments_count=actual_comments_count()
+            )
+        return fixed
+
+    def repair_author_stats(self, batch_size):
+        missing = User.objects.filter(stats__isnull=True)
+        for ids in self.batches(missing, batch_size):
+            AuthorStats.objects.bulk_create(
+                [AuthorStats(user_id=user_id) for user_id in ids],
+                ignore_conflicts=True,
+            )
+        actual = actual_author_stats()
+        drift = Q(
+            last_post_at__isnull=True, actual_last_post_at__isnull=False
+        ) | Q(
+            last_post_at__isnull=False, actual_last_post_at__isnull=True
+        ) | Q(
+            last_post_at__lt=F('actual_last_post_at')
+        ) | Q(
+            last_post_at__gt=F('actual_last_post_at')
+        )
+        for field in actual:
+            if field != 'last_post_at':
+                drift |= ~Q(**{field: F(f'actual_{field}')})
+        fixed = 0
+        for ids in self.batches(AuthorStats.objects.all(), batch_size):
+            drifted = AuthorStats.objects.filter(pk__in=ids).annotate(**{
+                f'actual_{field}': expression
+                for field, expression in actual.items()
+            }).filter(drift).values_list('pk', flat=True)
+            fixed += AuthorStats.objects.filter(pk__in=list(drifted)).update(
+                **actual
+            )
+        return fixed
+
+    def repair_celebrities(self):
+        """Режимы ленты авторов после изменения порога или счетчиков."""
+        threshold = settings.TIMELINE_CELEBRITY_FOLLOWERS
+        mismatched = AuthorStats.objects.filter(
+            Q(celebrity=False, followers_count__gt=threshold)
+            | Q(celebrity=True, followers_count__lte=threshold)
+        ).values_list('pk', flat=True)
+        fixed = 0
+        for author_id in mismatched.iterator():
+            timeline.update_celebrity(author_id)
+            fixed += 1
+        return fixed
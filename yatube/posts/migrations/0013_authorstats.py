@@ -0,0 +1,65 @@
+# Generated by Django 2.2.28 on 2026-10-18 17:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_author_stats(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+
+    def count(model, field):
+        return Coalesce(Subquery(
+            model.objects.filter(**{field: OuterRef('pk')}).order_by(
+            ).values(field).annotate(count=Count('pk')).values('count')
+        ), 0)
+
+    AuthorStats.objects.bulk_create(
+        (AuthorStats(user_id=user_id)
+         for user_id in User.objects.values_list('id', flat=True).iterator()),
+        batch_size=1000,
+    )
+    AuthorStats.objects.update(
+        posts_count=count(Post, 'author'),
+        comments_count=count(Comment, 'author'),
+        followers_count=count(Follow, 'author'),
+        following_count=count(Follow, 'user'),
+        last_post_at=Subquery(
+            Post.objects.filter(author=OuterRef('pk')).order_by().values(
+                'author'
+            ).annotate(last=Max('created')).values('last')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_auto_20221122_1346'),
+        ('posts', '0012_post_comments_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(help_text='Пользователь, к которому относится статистика', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('posts_count', models.PositiveIntegerField(default=0, help_text='Количество постов пользователя', verbose_name='Посты')),
+                ('comments_count', models.PositiveIntegerField(default=0, help_text='Количество комментариев пользователя', verbose_name='Комментарии')),
+                ('followers_count', models.PositiveIntegerField(default=0, help_text='Количество подписчиков пользователя', verbose_name='Подписчики')),
+                ('following_count', models.PositiveIntegerField(default=0, help_text='Количество авторов, на которых подписан пользователь', verbose_name='Подписки')),
+                ('last_post_at', models.DateTimeField(blank=True, help_text='Дата и время публикации последнего поста', null=True, verbose_name='Последний пост')),
+            ],
+            options={
+                'verbose_name': 'Статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.RunPython(fill_author_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 2.2.28 on 2026-10-18 18:22
+
+import django.contrib.postgres.search
+from django.db import migrations
+from django.db.models import Max, Min
+
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'posts_post_fts'
+
+BATCH_SIZE = 5000
+
+# Без долгих блокировок таблицы постов: сначала триггер, чтобы новые и
+# измененные посты сразу получали вектор, затем заполнение старых
+# пачками по id (каждая пачка — своя транзакция, миграция неатомарна)
+# и в конце CREATE INDEX CONCURRENTLY
+POSTGRESQL_TRIGGER_SQL = (
+    "CREATE TRIGGER post_search_vector_update BEFORE INSERT OR UPDATE "
+    "OF text, search_vector ON posts_post FOR EACH ROW EXECUTE PROCEDURE "
+    f"tsvector_update_trigger(search_vector, 'pg_catalog.{SEARCH_CONFIG}', "
+    "text)"
+)
+POSTGRESQL_BACKFILL_SQL = (
+    f"UPDATE posts_post SET search_vector = "
+    f"to_tsvector('{SEARCH_CONFIG}', text) "
+    "WHERE id >= %s AND id < %s AND search_vector IS NULL"
+)
+POSTGRESQL_INDEX_SQL = (
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS post_search_vector_idx '
+    'ON posts_post USING gin (search_vector)'
+)
+POSTGRESQL_REVERSE_SQL = [
+    'DROP INDEX CONCURRENTLY IF EXISTS post_search_vector_idx',
+    'DROP TRIGGER IF EXISTS post_search_vector_update ON posts_post',
+]
+SQLITE_SQL = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    "text, tokenize='unicode61 remove_diacritics 2')",
+    f'CREATE TRIGGER post_fts_insert AFTER INSERT ON posts_post BEGIN '
+    f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END',
+    f'CREATE TRIGGER post_fts_update AFTER UPDATE OF text ON posts_post '
+    f'BEGIN UPDATE {FTS_TABLE} SET text = new.text '
+    f'WHERE rowid = new.id; END',
+    f'CREATE TRIGGER post_fts_delete AFTER DELETE ON posts_post BEGIN '
+    f'DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END',
+    f'INSERT INTO {FTS_TABLE}(rowid, text) SELECT id, text FROM posts_post',
+]
+SQLITE_REVERSE_SQL = [
+    'DROP TRIGGER IF EXISTS post_fts_insert',
+    'DROP TRIGGER IF EXISTS post_fts_update',
+    'DROP TRIGGER IF EXISTS post_fts_delete',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def _execute(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def _fill_search_vector(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    bounds = Post.objects.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return
+    for start in range(bounds['first'], bounds['last'] + 1, BATCH_SIZE):
+        schema_editor.execute(
+            POSTGRESQL_BACKFILL_SQL, (start, start + BATCH_SIZE)
+        )
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(POSTGRESQL_TRIGGER_SQL)
+        _fill_search_vector(apps, schema_editor)
+        schema_editor.execute(POSTGRESQL_INDEX_SQL)
+    elif vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _execute(schema_editor, POSTGRESQL_REVERSE_SQL)
+    elif vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('posts', '0016_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Заполняется триггером базы, см. posts.search', null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
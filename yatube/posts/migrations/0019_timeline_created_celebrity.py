@@ -0,0 +1,61 @@
+# Generated by Django 2.2.28 on 2026-10-18 18:37
+
+from core.operations import AddIndexConcurrently
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 5000
+
+
+def fill_created(apps, schema_editor):
+    """Копирует Post.created в записи ленты пачками, каждая — отдельной
+    транзакцией, чтобы не блокировать таблицу целиком."""
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    created = Subquery(
+        Post.objects.filter(pk=OuterRef('post_id')).values('created')[:1]
+    )
+    last_pk = 0
+    while True:
+        pks = list(TimelineEntry.objects.filter(
+            pk__gt=last_pk, created__isnull=True
+        ).order_by('pk').values_list('pk', flat=True)[:BATCH_SIZE])
+        if not pks:
+            return
+        TimelineEntry.objects.filter(pk__in=pks).update(created=created)
+        last_pk = pks[-1]
+
+
+def mark_celebrities(apps, schema_editor):
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    AuthorStats.objects.filter(
+        followers_count__gt=settings.TIMELINE_CELEBRITY_FOLLOWERS
+    ).update(celebrity=True)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('posts', '0018_comment_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='celebrity',
+            field=models.BooleanField(default=False, help_text='Посты автора не раскладываются по лентам подписчиков, а подмешиваются при чтении (posts.timeline)', verbose_name='Посты читаются при показе ленты'),
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='created',
+            field=models.DateTimeField(help_text='Дата и время публикации поста', null=True, verbose_name='Дата публикации'),
+        ),
+        migrations.RunPython(mark_celebrities, migrations.RunPython.noop),
+        migrations.RunPython(fill_created, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-created', '-post'], name='timeline_user_created_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
-from core.models import CreatedModel
+from core.deletion import DeletionScopeQuerySet
+from core.models import CreatedModel, DeletionScopeModel, ImageModel
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from pytils.translit import slugify
 
@@ -35,7 +37,13 @@ class Group(models.Model):
         super().save(*args, **kwargs)
 
 
-class Post(CreatedModel):
+class PostManager(models.Manager.from_queryset(DeletionScopeQuerySet)):
+    def get_queryset(self):
+        # поисковый вектор нужен только в условии поиска
+        return super().get_queryset().defer('search_vector')
+
+
+class Post(DeletionScopeModel, ImageModel, CreatedModel):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Введите текст нового поста',
@@ -63,15 +71,65 @@ class Post(CreatedModel):
         verbose_name='Картинка',
         help_text='Выберите картинку',
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Комментарии',
+        help_text='Количество комментариев к посту',
+    )
+
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор',
+        help_text='Заполняется триггером базы, см. posts.search',
+    )
+
+    objects = PostManager()
+
+    image_derivatives = ('post',)
+    image_variant_widths = (320, 640, 960, 1280)
 
     class Meta:
         ordering = ['-created']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(
+                name='post_created_idx',
+                fields=['-created', '-id'],
+            ),
+            models.Index(
+                name='post_author_created_idx',
+                fields=['author', '-created', '-id'],
+            ),
+            models.Index(
+                name='post_group_created_idx',
+                fields=['group', '-created', '-id'],
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # группа на момент загрузки: при смене группы нужно сбросить
+        # кеш и старой, и новой
+        instance.loaded_group_id = instance.__dict__.get('group_id')
+        return instance
+
+    def get_cache_scopes(self):
+        """Области кеша, в которых отображается пост."""
+        group_ids = {self.group_id, getattr(self, 'loaded_group_id', None)}
+        return [
+            'index',
+            f'post:{self.id}',
+            f'profile:{self.author_id}',
+            *(f'group:{group_id}' for group_id in group_ids if group_id),
+        ]
+
 
 class Comment(CreatedModel):
     post = models.ForeignKey(
@@ -97,6 +155,16 @@ class Comment(CreatedModel):
         ordering = ['-created']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                name='comment_post_created_idx',
+                fields=['post', '-created', '-id'],
+            ),
+            models.Index(
+                name='comment_created_idx',
+                fields=['-created', '-id'],
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -129,3 +197,102 @@ class Follow(models.Model):
                 check=~models.Q(user=models.F('author'))
             ),
         ]
+        indexes = [
+            models.Index(
+                name='follow_author_user_idx',
+                fields=['author', 'user'],
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+        help_text='Пользователь, в ленту которого попадает пост',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+        help_text='Пост автора, на которого подписан пользователь',
+    )
+    # копия Post.created: лента читается одним диапазоном индекса
+    # timeline_user_created_idx без соединения и сортировки постов.
+    # NULL допускается только для записей, созданных до миграции 0019
+    created = models.DateTimeField(
+        null=True,
+        verbose_name='Дата публикации',
+        help_text='Дата и время публикации поста',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи ленты подписок'
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_timeline_entry',
+                fields=['user', 'post'],
+            ),
+        ]
+        indexes = [
+            models.Index(
+                name='timeline_user_created_idx',
+                fields=['user', '-created', '-post'],
+            ),
+        ]
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+        help_text='Пользователь, к которому относится статистика',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Посты',
+        help_text='Количество постов пользователя',
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Комментарии',
+        help_text='Количество комментариев пользователя',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчики',
+        help_text='Количество подписчиков пользователя',
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписки',
+        help_text='Количество авторов, на которых подписан пользователь',
+    )
+    last_post_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Последний пост',
+        help_text='Дата и время публикации последнего поста',
+    )
+    celebrity = models.BooleanField(
+        default=False,
+        verbose_name='Посты читаются при показе ленты',
+        help_text=(
+            'Посты автора не раскладываются по лентам подписчиков, '
+            'а подмешиваются при чтении (posts.timeline)'
+        ),
+    )
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return str(self.user)
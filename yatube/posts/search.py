@@ -0,0 +1,75 @@
+"""
+Полнотекстовый поиск по постам.
+
+На PostgreSQL текст поста хранится в колонке search_vector типа
+tsvector (конфигурация russian) с GIN-индексом, на SQLite — в таблице
+FTS5 posts_post_fts. Обе поддерживаются триггерами базы при каждой
+вставке, изменении текста и удалении поста, в том числе при
+bulk_create и queryset.update, поэтому Python-код индекс не трогает.
+Триггеры, индекс и таблицу FTS5 создает миграция 0017_post_search.
+
+search_posts возвращает посты с аннотацией rank (чем больше, тем
+релевантнее), упорядочиваемые SEARCH_ORDERING, — по этому ключу
+работает KeysetPaginator.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+from .models import Post
+
+SEARCH_CONFIG = 'russian'
+SEARCH_ORDERING = ('-rank', '-created', '-id')
+FTS_TABLE = 'posts_post_fts'
+
+
+def get_terms(query) -> list:
+    return re.findall(r'\w+', query.lower())
+
+
+def _fts_query(terms) -> str:
+    """Запрос FTS5: все слова, каждое — в кавычках, без операторов."""
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def search_posts(query, queryset=None):
+    """Посты, содержащие все слова запроса, с аннотацией rank."""
+    if queryset is None:
+        queryset = Post.objects.all()
+    terms = get_terms(query)
+    if not terms:
+        return queryset.none().annotate(rank=Cast(0, FloatField()))
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(
+            ' '.join(terms), config=SEARCH_CONFIG, search_type='plain'
+        )
+        # ts_rank возвращает real: приведение к double нужно, чтобы
+        # значение из курсора совпадало с вычисленным в базе
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), search_query),
+                      FloatField()),
+        )
+    if connection.vendor == 'sqlite':
+        match = _fts_query(terms)
+        # не pk__in=RawSQL(...): Django обернет подзапрос во вторые
+        # скобки, и SQLite вычислит его как скалярный (одна строка)
+        return queryset.extra(
+            where=[
+                f'posts_post.id IN (SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s)'
+            ],
+            params=[match],
+        ).annotate(rank=RawSQL(
+            # bm25 тем меньше, чем релевантнее
+            f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = posts_post.id',
+            (match,),
+            output_field=FloatField(),
+        ))
+    for term in terms:
+        queryset = queryset.filter(text__icontains=term)
+    return queryset.annotate(rank=Cast(0, FloatField()))
@@ -0,0 +1,117 @@
+from core import deletion
+from core.cache import bump_versions
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import autocomplete, counters, timeline
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+# поля пользователя, которые выводятся в лентах
+USER_DISPLAY_FIELDS = {'username', 'first_name', 'last_name', 'image'}
+# поля пользователя в автодополнении
+USER_AUTOCOMPLETE_FIELDS = {'username', 'first_name', 'last_name', 'is_active'}
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    if created:
+        # нового пользователя еще нет ни на одной закешированной странице
+        AuthorStats.objects.get_or_create(user=instance)
+        autocomplete.record_added(autocomplete.users)
+        return
+    if update_fields is None or USER_DISPLAY_FIELDS & set(update_fields):
+        bump_versions(
+            'users', f'profile:{instance.pk}', f'author:{instance.pk}'
+        )
+    if update_fields is None or USER_AUTOCOMPLETE_FIELDS & set(
+        update_fields
+    ):
+        autocomplete.record_changed(autocomplete.users)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # счетчики комментариев пользователя сдвигаются здесь одним UPDATE
+    # на пост, а не в post_delete каждого комментария каскада
+    if not deletion.mark('users', instance.pk):
+        return
+    scopes = set()
+    for post in Post.objects.filter(
+        pk__in=counters.comments_removed_with_author(instance.pk)
+    ).only('pk', 'author', 'group'):
+        scopes.update(post.get_cache_scopes())
+    if scopes:
+        bump_versions(*scopes)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    autocomplete.record_changed(autocomplete.users)
+
+
+@receiver([post_save, post_delete], sender=Group)
+def group_changed(sender, instance, created=False, **kwargs):
+    bump_versions('groups', f'group:{instance.pk}')
+    if created:
+        autocomplete.record_added(autocomplete.groups)
+    else:
+        autocomplete.record_changed(autocomplete.groups)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.post_added(instance)
+        timeline.fan_out(instance)
+    bump_versions(*instance.get_cache_scopes())
+    instance.loaded_group_id = instance.group_id
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    if deletion.mark('posts', instance.pk):
+        counters.comments_removed_with_post(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    if instance.author_id not in deletion.marked('users'):
+        counters.post_removed(instance)
+    bump_versions(*instance.get_cache_scopes())
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_comments_count(instance.post_id, 1)
+        counters.change_author_stats(instance.author_id, comments_count=1)
+    bump_versions(*instance.post.get_cache_scopes())
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if (
+        instance.post_id in deletion.marked('posts')
+        or instance.author_id in deletion.marked('users')
+    ):
+        return
+    counters.change_comments_count(instance.post_id, -1)
+    counters.change_author_stats(instance.author_id, comments_count=-1)
+    bump_versions(*instance.post.get_cache_scopes())
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_author_stats(instance.author_id, followers_count=1)
+        counters.change_author_stats(instance.user_id, following_count=1)
+        timeline.update_celebrity(instance.author_id)
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.change_author_stats(instance.author_id, followers_count=-1)
+    counters.change_author_stats(instance.user_id, following_count=-1)
+    timeline.prune(instance.user_id, instance.author_id)
+    timeline.update_celebrity(instance.author_id)
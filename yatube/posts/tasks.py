@@ -0,0 +1,9 @@
+from core.queue import task
+
+from . import timeline
+
+
+@task
+def materialize_timelines(author_id):
+    """Разложить посты бывшей знаменитости по лентам подписчиков."""
+    timeline.materialize(author_id)
@@ -0,0 +1,67 @@
+from core.cache import get_versions
+from core.images import DerivativeResolver
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+def get_card_scopes(post):
+    """Области кеша, от которых зависит карточка поста."""
+    return (f'post:{post.id}', f'author:{post.author_id}', 'groups')
+
+
+def get_card_images(post, is_profile):
+    """Картинки карточки и их размеры."""
+    yield post.image, 'post'
+    if not is_profile:
+        yield post.author.image, 'avatar'
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, is_profile=False, is_group_list=False):
+    """
+    Отрендеренные карточки posts/includes/post_article.html.
+
+    Карточки берутся из кеша одним get_many по ключу из id поста и
+    версий поста, автора и групп; промахи рендерятся и сохраняются
+    одним set_many. Миниатюры для промахов выбираются заранее одним
+    запросом к хранилищу ключей sorl.
+    """
+    posts = list(posts)
+    versions = get_versions(
+        {scope for post in posts for scope in get_card_scopes(post)}
+    )
+    keys = [
+        'post-card:{}:{:d}{:d}:{}'.format(
+            post.id, is_profile, is_group_list,
+            '.'.join(str(versions[scope]) for scope in get_card_scopes(post)),
+        )
+        for post in posts
+    ]
+    cards = cache.get_many(keys)
+    missed = [
+        (key, post) for key, post in zip(keys, posts) if key not in cards
+    ]
+    derivatives = DerivativeResolver.for_request(context.get('request'))
+    derivatives.prefetch(
+        pair for _, post in missed
+        for pair in get_card_images(post, is_profile)
+    )
+    rendered = {}
+    for key, post in missed:
+        rendered[key] = render_to_string(
+            'posts/includes/post_article.html', {
+                'post': post,
+                'is_profile': is_profile,
+                'is_group_list': is_group_list,
+                'derivatives': derivatives,
+            }
+        )
+    if rendered:
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(rendered)
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,90 @@
+import warnings
+
+from django.contrib.auth import get_user_model
+from django.core.paginator import UnorderedObjectListWarning
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class AdminTests(TestCase):
+    """Списки постов и комментариев в админке."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        for i in range(5):
+            post = Post.objects.create(
+                author=cls.admin, group=cls.group, text=f'Пост номер {i}'
+            )
+            Comment.objects.create(
+                post=post, author=cls.admin, text=f'Комментарий {i}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(AdminTests.admin)
+
+    def changelist(self, model, params=None):
+        url = reverse(f'admin:posts_{model}_changelist')
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_rows_do_not_add_queries(self):
+        for model in ('post', 'comment'):
+            with self.subTest(model=model):
+                with CaptureQueriesContext(connection) as queries:
+                    self.changelist(model)
+                Post.objects.create(author=AdminTests.admin, text='Еще')
+                Comment.objects.create(
+                    post=Post.objects.first(),
+                    author=AdminTests.admin,
+                    text='Еще',
+                )
+                with self.assertNumQueries(len(queries.captured_queries)):
+                    self.changelist(model)
+
+    def test_post_search_uses_index(self):
+        response = self.changelist('post', {'q': 'номер 3'})
+        self.assertEqual(
+            [post.text for post in response.context['cl'].result_list],
+            ['Пост номер 3'],
+        )
+
+    def test_date_hierarchy(self):
+        created = Post.objects.first().created
+        for model in ('post', 'comment'):
+            with self.subTest(model=model):
+                response = self.changelist(model, {
+                    'created__year': created.year,
+                    'created__month': created.month,
+                })
+                self.assertEqual(response.context['cl'].result_count, 5)
+
+    def test_autocomplete_widgets(self):
+        for url, term, expected in (
+            ('admin:users_user_autocomplete', 'AD', 'admin'),
+            ('admin:posts_group_autocomplete', 'Груп', 'Группа'),
+            ('admin:posts_post_autocomplete', 'номер 2', 'Пост номер 2'),
+        ):
+            with self.subTest(url=url):
+                with warnings.catch_warnings():
+                    warnings.simplefilter('error', UnorderedObjectListWarning)
+                    response = self.client.get(
+                        reverse(url), {'term': term}
+                    )
+                self.assertEqual(
+                    [item['text'] for item in response.json()['results']],
+                    [expected],
+                )
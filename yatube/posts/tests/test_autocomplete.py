@@ -0,0 +1,139 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .. import autocomplete
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class AutocompleteTests(TestCase):
+    """Автодополнение пользователей и сообществ по префиксу."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for username in ('Anna', 'anton', 'boris', 'andrey'):
+            User.objects.create_user(username=username)
+        User.objects.create_user(username='anfisa', is_active=False)
+        Group.objects.create(title='Анекдоты', slug='anekdoty')
+        Group.objects.create(title='Бег', slug='beg')
+
+    def setUp(self):
+        cache.clear()
+        for index in (autocomplete.users, autocomplete.groups):
+            index.clear()
+            index.background = False
+            self.addCleanup(vars(index).pop, 'background')
+
+    def usernames(self, prefix, limit=10):
+        return [
+            user['username']
+            for user in autocomplete.users.search(prefix, limit)
+        ]
+
+    def test_prefix_results(self):
+        self.assertEqual(self.usernames('an'), ['andrey', 'Anna', 'anton'])
+        self.assertEqual(self.usernames('AN', limit=2), ['andrey', 'Anna'])
+        self.assertEqual(self.usernames('x'), [])
+        self.assertEqual(self.usernames(''), [])
+        self.assertEqual(
+            autocomplete.autocomplete('a'),
+            {
+                'users': [
+                    {'username': name, 'first_name': '', 'last_name': ''}
+                    for name in ('andrey', 'Anna', 'anton')
+                ],
+                'groups': [{'slug': 'anekdoty', 'title': 'Анекдоты'}],
+            },
+        )
+
+    def test_index_follows_changes(self):
+        self.assertEqual(self.usernames('b'), ['boris'])
+        with self.assertNumQueries(0):
+            self.usernames('b')
+        User.objects.create_user(username='bella')
+        self.assertEqual(self.usernames('b'), ['bella', 'boris'])
+        user = User.objects.get(username='boris')
+        user.username = 'vadim'
+        user.save()
+        self.assertEqual(self.usernames('b'), ['bella'])
+        self.assertEqual(self.usernames('v'), ['vadim'])
+        user.delete()
+        self.assertEqual(self.usernames('v'), [])
+        Group.objects.create(title='Бокс', slug='boks')
+        self.assertEqual(
+            [group['slug'] for group in autocomplete.groups.search('b', 10)],
+            ['beg', 'boks'],
+        )
+
+    def test_results_are_ranked(self):
+        """Сначала популярные: по подписчикам и по числу постов."""
+        anton = User.objects.get(username='anton')
+        for username in ('Anna', 'boris'):
+            Follow.objects.create(
+                user=User.objects.get(username=username), author=anton
+            )
+        Follow.objects.create(
+            user=anton, author=User.objects.get(username='Anna')
+        )
+        Post.objects.create(
+            author=anton, text='Пост', group=Group.objects.get(slug='beg')
+        )
+        Group.objects.create(title='Бокс', slug='boks')
+        for memory_limit in (200000, 0):
+            autocomplete.users.clear()
+            autocomplete.groups.clear()
+            with self.subTest(memory_limit=memory_limit), override_settings(
+                AUTOCOMPLETE_MEMORY_LIMIT=memory_limit
+            ):
+                self.assertEqual(
+                    self.usernames('an'), ['anton', 'Anna', 'andrey']
+                )
+                self.assertEqual(self.usernames('an', limit=1), ['anton'])
+                self.assertEqual(
+                    [
+                        group['slug']
+                        for group in autocomplete.groups.search('b', 10)
+                    ],
+                    ['beg', 'boks'],
+                )
+
+    @override_settings(AUTOCOMPLETE_MEMORY_LIMIT=0)
+    def test_database_fallback(self):
+        self.assertEqual(self.usernames('an'), ['andrey', 'Anna', 'anton'])
+        self.assertIsNone(autocomplete.users._items)
+
+    def test_load_does_not_block_search(self):
+        """Пока массив загружается в фоне, поиск отвечает из базы."""
+        autocomplete.users.background = True
+        with mock.patch.object(autocomplete.threading, 'Thread') as thread:
+            self.assertEqual(self.usernames('an'), ['andrey', 'Anna', 'anton'])
+            self.assertEqual(self.usernames('b'), ['boris'])
+        thread.assert_called_once()
+        self.assertIsNone(autocomplete.users._items)
+        autocomplete.users._reload(*thread.call_args[1]['args'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.usernames('b'), ['boris'])
+
+    @override_settings(AUTOCOMPLETE_REFRESH_INTERVAL=0)
+    def test_index_is_reloaded_periodically(self):
+        self.assertEqual(self.usernames('b'), ['boris'])
+        with self.assertNumQueries(1):
+            self.usernames('b')
+
+    def test_endpoint(self):
+        url = reverse('api:autocomplete')
+        response = APIClient().get(url, {'q': 'an', 'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [user['username'] for user in response.data['users']],
+            ['andrey'],
+        )
+        response = APIClient().get(url)
+        self.assertEqual(response.data, {'users': [], 'groups': []})
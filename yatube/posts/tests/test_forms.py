@@ -1,10 +1,19 @@
+import re
 import shutil
 import tempfile
+from io import StringIO
 
+from core.queue import run_pending
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ..models import Group, Post
@@ -113,3 +122,121 @@ class PostsFormsTests(TestCase):
                 image='posts/small_edit.gif',
             ).exists()
         )
+
+    def test_post_create_makes_derivatives(self):
+        """
+        Размеры картинки создаются при загрузке, и страница
+        показывает их без чтения исходного файла.
+        """
+        uploaded = SimpleUploadedFile(
+            name='derivative.gif',
+            content=PostsFormsTests.small_gif,
+            content_type='image/gif'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'test_post_create_makes_derivatives',
+                  'image': uploaded},
+        )
+        run_pending()
+        post = Post.objects.get(text='test_post_create_makes_derivatives')
+        default_storage.delete(post.image.name)
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+        thumbnail = re.search(
+            r'src="/media/(cache/[^"]+)"', response.content.decode()
+        ).group(1)
+        self.assertTrue(default_storage.exists(thumbnail))
+
+    def test_page_thumbnails_are_fetched_in_one_query(self):
+        """Миниатюры всех карточек страницы читаются одним запросом."""
+        for i in range(3):
+            uploaded = SimpleUploadedFile(
+                name=f'batch{i}.gif',
+                content=PostsFormsTests.small_gif,
+                content_type='image/gif'
+            )
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                data={'text': f'Пост с картинкой {i}', 'image': uploaded},
+            )
+        run_pending()
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(reverse('posts:index'))
+        self.assertEqual(response.content.decode().count('/media/cache/'), 3)
+        kvstore_queries = [
+            query for query in queries.captured_queries
+            if 'thumbnail_kvstore' in query['sql']
+        ]
+        self.assertEqual(len(kvstore_queries), 1)
+
+    def test_post_create_stores_image_metadata(self):
+        """При загрузке сохраняются размеры, формат и превью картинки."""
+        uploaded = SimpleUploadedFile(
+            name='metadata.gif',
+            content=PostsFormsTests.small_gif,
+            content_type='image/gif'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'test_metadata', 'image': uploaded},
+        )
+        post = Post.objects.get(text='test_metadata')
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertEqual(post.image_size, len(PostsFormsTests.small_gif))
+        self.assertEqual(post.image_format, 'gif')
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,')
+        )
+
+    def test_fill_image_metadata(self):
+        """Команда заполняет метаданные и варианты загруженных картинок."""
+        name = default_storage.save(
+            'posts/backfill.gif', ContentFile(PostsFormsTests.small_gif)
+        )
+        post = Post.objects.create(
+            author=PostsFormsTests.user, text='backfill', image=name
+        )
+        broken = Post.objects.create(
+            author=PostsFormsTests.user, text='broken', image='posts/no.gif'
+        )
+        self.assertIsNone(post.image_width)
+        out = StringIO()
+        call_command('fill_image_metadata', batch_size=1, stdout=out)
+        post.refresh_from_db()
+        broken.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertIsNone(broken.image_width)
+        self.assertIn('заполнено 1, не прочитано 1', out.getvalue())
+        self.assertEqual(post.get_image_variants(), [])
+        run_pending()
+        post.refresh_from_db()
+        self.assertTrue(post.get_image_variants())
+
+    def test_post_create_makes_variants(self):
+        """Создаются WebP-копии с именем по хешу содержимого и srcset."""
+        uploaded = SimpleUploadedFile(
+            name='variants.gif',
+            content=PostsFormsTests.small_gif,
+            content_type='image/gif'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'test_variants', 'image': uploaded},
+        )
+        run_pending()
+        post = Post.objects.get(text='test_variants')
+        variants = post.get_image_variants()
+        webp = [variant for variant in variants if variant['format'] == 'webp']
+        self.assertEqual(len(webp), 1)
+        self.assertEqual((webp[0]['width'], webp[0]['height']), (2, 1))
+        self.assertRegex(webp[0]['name'], r'^variants/\w\w/\w{40}\.webp$')
+        self.assertTrue(default_storage.exists(webp[0]['name']))
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+        self.assertContains(
+            response, f'srcset="{webp[0]["url"]} 2w"'
+        )
@@ -1,7 +1,13 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.signals import post_delete
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from ..models import Comment, Group, Post
+from ..models import AuthorStats, Comment, Follow, Group, Post
 
 User = get_user_model()
 
@@ -164,3 +170,152 @@ class PostModelTest(TestCase):
         group = PostModelTest.group
         expected_object_name = group.title
         self.assertEqual(expected_object_name, str(group))
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(author=self.user, text='Пост')
+
+    def test_comments_count_follows_comments(self):
+        """Счетчик комментариев меняется при создании и удалении."""
+        comments = [
+            Comment.objects.create(author=self.user, post=self.post, text=i)
+            for i in range(3)
+        ]
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 3)
+        comments[0].delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 2)
+
+    def test_author_stats_follow_writes(self):
+        """Статистика автора обновляется при публикациях и подписках."""
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        Comment.objects.create(author=reader, post=self.post, text='-')
+        stats = AuthorStats.objects.get(user=self.user)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(stats.last_post_at, self.post.created)
+        reader_stats = AuthorStats.objects.get(user=reader)
+        self.assertEqual(reader_stats.following_count, 1)
+        self.assertEqual(reader_stats.comments_count, 1)
+        self.post.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.posts_count, 0)
+        self.assertIsNone(stats.last_post_at)
+
+    def test_cascade_delete_updates_counters_per_parent(self):
+        """Каскадное удаление не пересчитывает счетчики поштучно."""
+        reader = User.objects.create_user(username='reader')
+        other_post = Post.objects.create(author=reader, text='Другой')
+
+        def comment(n):
+            Comment.objects.bulk_create(
+                Comment(author=author, post=post, text='-')
+                for author, post in (
+                    (reader, self.post),
+                    (self.user, self.post),
+                    (self.user, other_post),
+                ) for _ in range(n)
+            )
+            # bulk_create идет мимо сигналов: счетчики пересчитываются
+            call_command('repair_counters', stdout=StringIO())
+
+        def queries(obj):
+            with CaptureQueriesContext(connection) as captured:
+                obj.delete()
+            return len(captured)
+
+        comment(1)
+        few = queries(Post.objects.get(pk=self.post.pk))
+        reader_stats = AuthorStats.objects.filter(user=reader)
+        self.assertEqual(reader_stats.get().comments_count, 0)
+        self.post = Post.objects.create(author=self.user, text='Пост')
+        comment(5)
+        self.assertEqual(queries(Post.objects.get(pk=self.post.pk)), few)
+        self.assertEqual(reader_stats.get().comments_count, 0)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.user).comments_count, 6
+        )
+        self.user.delete()
+        other_post.refresh_from_db()
+        self.assertEqual(other_post.comments_count, 0)
+        stats = reader_stats.get()
+        self.assertEqual((stats.posts_count, stats.comments_count), (1, 0))
+
+    def test_rolled_back_delete_leaves_no_marks(self):
+        """После отката удаления поста его комментарии считаются как раньше."""
+        comment = Comment.objects.create(
+            author=self.user, post=self.post, text='-'
+        )
+
+        def fail(sender, **kwargs):
+            raise RuntimeError
+
+        # ошибка посреди каскада: пост уже отмечен, но не удален
+        post_delete.connect(fail, sender=Comment)
+        try:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Post.objects.get(pk=self.post.pk).delete()
+        finally:
+            post_delete.disconnect(fail, sender=Comment)
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_delete_with_drifted_counters(self):
+        """Комментарий, созданный мимо сигналов, удаляется без ошибки."""
+        Comment.objects.bulk_create([
+            Comment(author=self.user, post=self.post, text='-')
+        ])
+        Comment.objects.get(post=self.post).delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.user).comments_count, 0
+        )
+
+    def test_repair_counters_fixes_drift(self):
+        """Команда repair_counters исправляет расхождения счетчиков."""
+        Comment.objects.create(author=self.user, post=self.post, text='-')
+        Post.objects.filter(pk=self.post.pk).update(comments_count=10)
+        AuthorStats.objects.filter(user=self.user).update(posts_count=10)
+        call_command('repair_counters', batch_size=1, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.user).posts_count, 1
+        )
+
+
+class QueryPlansTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='auth')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(title='Группа', slug='group')
+        post = Post.objects.create(author=user, text='Пост', group=group)
+        Comment.objects.create(author=reader, post=post, text='-')
+        Follow.objects.create(user=reader, author=user)
+
+    def test_hot_queries_use_indexes(self):
+        """Запросы лент, комментариев и подписок используют индексы."""
+        out = StringIO()
+        # в таблицах по строке: без запрета последовательного чтения
+        # PostgreSQL не стал бы читать индексы
+        call_command(
+            'check_query_plans', no_seqscan=True,
+            stdout=out, stderr=StringIO(),
+        )
+        for index in (
+            'post_created_idx',
+            'post_author_created_idx',
+            'post_group_created_idx',
+            'comment_post_created_idx',
+            'timeline_user_created_idx',
+            'follow_author_user_idx',
+        ):
+            with self.subTest(index=index):
+                self.assertIn(index, out.getvalue())
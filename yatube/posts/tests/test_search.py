@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Post
+from ..search import SEARCH_ORDERING, search_posts
+
+User = get_user_model()
+
+
+class PostSearchTests(TestCase):
+    """Полнотекстовый поиск по постам."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.once = Post.objects.create(
+            author=cls.user, text='Кошки любят молоко'
+        )
+        cls.twice = Post.objects.create(
+            author=cls.user, text='Кошки, кошки и еще раз кошки'
+        )
+        cls.other = Post.objects.create(
+            author=cls.user, text='Собаки любят косточки'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def found(self, query):
+        return list(search_posts(query).order_by(
+            *SEARCH_ORDERING
+        ).values_list('id', flat=True))
+
+    def test_ranked_results(self):
+        self.assertEqual(
+            self.found('кошки'),
+            [PostSearchTests.twice.id, PostSearchTests.once.id],
+        )
+        self.assertEqual(
+            self.found('любят молоко'), [PostSearchTests.once.id]
+        )
+        self.assertEqual(self.found('  '), [])
+        self.assertEqual(self.found('"кошки*('), self.found('кошки'))
+
+    def test_index_follows_changes(self):
+        post = Post.objects.create(author=PostSearchTests.user, text='Ежик')
+        self.assertEqual(self.found('ежик'), [post.id])
+        post.text = 'Белка'
+        post.save()
+        self.assertEqual(self.found('ежик'), [])
+        self.assertEqual(self.found('белка'), [post.id])
+        Post.objects.filter(pk=post.pk).update(text='Барсук')
+        self.assertEqual(self.found('барсук'), [post.id])
+        post.delete()
+        self.assertEqual(self.found('барсук'), [])
+
+    @override_settings(ITEMS_PER_PAGE=1)
+    def test_search_page(self):
+        url = reverse('posts:search')
+        response = Client().get(url, {'q': 'кошки'})
+        self.assertEqual(response.status_code, 200)
+        page = response.context['page_obj']
+        self.assertEqual(list(page), [PostSearchTests.twice])
+        response = Client().get(
+            url, {'q': 'кошки', 'cursor': page.next_cursor}
+        )
+        self.assertEqual(
+            list(response.context['page_obj']), [PostSearchTests.once]
+        )
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%88%D0%BA%D0%B8&')
+
+    def test_search_page_without_query(self):
+        response = Client().get(reverse('posts:search'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['page_obj']), [])
+
+    def test_api_search(self):
+        url = reverse('api:posts-search')
+        client = APIClient()
+        response = client.get(url, {'q': 'кошки', 'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [post['id'] for post in response.data['results']],
+            [PostSearchTests.twice.id],
+        )
+        response = client.get(response.data['next'])
+        self.assertEqual(
+            [post['id'] for post in response.data['results']],
+            [PostSearchTests.once.id],
+        )
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(client.get(url).status_code, 400)
@@ -1,14 +1,20 @@
+from io import StringIO
+from unittest import mock
+
+from core.paginator import KeysetPage
+from core.queue import run_pending
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.core.paginator import Page
-from django.db.models.query import QuerySet
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from ..forms import CommentForm, PostForm
-from ..models import Follow, Group, Post
+from ..models import Comment, Follow, Group, Post, TimelineEntry
+from ..timeline import is_celebrity
 
 User = get_user_model()
 
@@ -79,7 +85,7 @@ class PostsViewsTests(TestCase):
                                  'post': Post,
                                  'posts_count': int,
                                  'form': CommentForm,
-                                 'comments': QuerySet,
+                                 'comments': KeysetPage,
             }),
             (reverse('posts:post_create'), 'posts/create_post.html', {
                 'form': PostForm,
@@ -297,16 +303,15 @@ class PostsViewsTests(TestCase):
             response.context['page_obj'][0].text,
             cached_post.text
         )
-        # проверим, что у закешированной страницы нет context'а
-        # response = self.client.get(reverse('posts:index'))
-        # self.assertIsNone(response.context)
-        # проверим, что пост остался после удаления
-        cached_post.delete()
+        # изменение в обход сигналов не сбрасывает закешированный фрагмент
+        Post.objects.filter(pk=cached_post.pk).update(text='Новый текст')
         response = self.client.get(reverse('posts:index'))
         self.assertContains(response, cached_post.text)
-        # проверим, что пост пропал после очистки кеша
-        cache.clear()
+        # проверим, что пост пропал сразу после удаления
+        cached_post.delete()
         response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, cached_post.text)
+        self.assertNotContains(response, 'Новый текст')
         self.assertIn('page_obj', response.context)
         self.assertGreater(len(response.context['page_obj']), 0)
         self.assertNotEqual(
@@ -314,6 +319,44 @@ class PostsViewsTests(TestCase):
             cached_post.text
         )
 
+    def test_group_page_cache_follows_post_edit(self):
+        """Перенос поста в другую группу сбрасывает кеш обеих групп."""
+        post = Post.objects.create(
+            author=PostsViewsTests.user,
+            text='Пост для переноса',
+            group=PostsViewsTests.group,
+        )
+        old_group_url = reverse('posts:group_list', kwargs={'slug': 'slug'})
+        new_group_url = reverse('posts:group_list', kwargs={'slug': 'slug2'})
+        self.assertContains(self.client.get(old_group_url), post.text)
+        self.assertNotContains(self.client.get(new_group_url), post.text)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            data={'text': post.text, 'group': PostsViewsTests.group2.id},
+        )
+        self.assertNotContains(self.client.get(old_group_url), post.text)
+        self.assertContains(self.client.get(new_group_url), post.text)
+
+    def test_post_cards_cache_follows_author_change(self):
+        """Смена имени автора обновляет закешированные карточки постов."""
+        follow_url = reverse('posts:follow_index')
+        self.assertContains(
+            self.authorized_client.get(follow_url), 'Тестовый пост 2'
+        )
+        User.objects.filter(pk=PostsViewsTests.user2.pk).update(
+            first_name='Устаревшее'
+        )
+        self.assertNotContains(
+            self.authorized_client.get(follow_url), 'Устаревшее'
+        )
+        self.authorized_client2.post(
+            reverse('users:user_change'),
+            data={'first_name': 'Иван', 'last_name': 'Петров'},
+        )
+        self.assertContains(
+            self.authorized_client.get(follow_url), 'Иван Петров'
+        )
+
     def test_profile_follow_correct(self):
         # неавторизованный пользователь не может подписаться
         profile_follow_url = reverse(
@@ -451,3 +494,261 @@ class PaginatorViewsTest(TestCase):
                 self.assertIn('page_obj', response.context)
                 page_obj = response.context['page_obj']
                 self.assertEqual(len(page_obj), posts_count)
+
+    def test_paginator_cursor_navigation(self):
+        """
+        Паджинатор по курсору проходит ленту вперед и назад
+        без пропусков и повторов.
+        """
+        expected = list(
+            Post.objects.order_by('-created', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        url = reverse('posts:index')
+        pages = []
+        response = self.authorized_client.get(url)
+        while True:
+            page_obj = response.context['page_obj']
+            pages.append([post.id for post in page_obj])
+            if not page_obj.has_next():
+                break
+            response = self.authorized_client.get(
+                url, {'cursor': page_obj.next_cursor}
+            )
+        self.assertEqual(sum(pages, []), expected)
+        for page_ids in reversed(pages[:-1]):
+            response = self.authorized_client.get(
+                url, {'cursor': page_obj.previous_cursor}
+            )
+            page_obj = response.context['page_obj']
+            self.assertEqual([post.id for post in page_obj], page_ids)
+        self.assertFalse(page_obj.has_previous())
+        self.assertIsNone(page_obj.next_page_number())
+        self.assertIsNone(page_obj.start_index())
+
+    def test_cursor_pages_skip_fragment_cache(self):
+        """Страницы по курсору обходят {% cache %} и ничего не пишут."""
+        url = reverse('posts:index')
+        page_obj = self.client.get(url).context['page_obj']
+        with mock.patch(
+            'django.templatetags.cache.make_template_fragment_key'
+        ) as make_key:
+            response = self.client.get(url, {'cursor': page_obj.next_cursor})
+        self.assertFalse(response.context['fragment_cached'])
+        make_key.assert_not_called()
+
+    def test_paginator_invalid_cursor(self):
+        """Некорректный курсор приводит на первую страницу."""
+        response = self.authorized_client.get(
+            reverse('posts:index'), {'cursor': 'broken'}
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), settings.ITEMS_PER_PAGE)
+        self.assertFalse(page_obj.has_previous())
+
+    @override_settings(COMMENTS_PER_PAGE=3)
+    def test_comments_load_more(self):
+        """Комментарии отдаются порциями, следующая — фрагментом."""
+        post = Post.objects.filter(author=PaginatorViewsTest.user).first()
+        Comment.objects.bulk_create(
+            Comment(post=post, author=PaginatorViewsTest.user2,
+                    text=f'Комментарий {i}')
+            for i in range(5)
+        )
+        expected = list(post.comments.order_by('-created', '-id'))
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+        comments = response.context['comments']
+        self.assertEqual(list(comments), expected[:3])
+        self.assertTrue(comments.has_next())
+        response = self.authorized_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': post.id}),
+            {'cursor': comments.next_cursor},
+        )
+        self.assertTemplateUsed(response, 'includes/comment_list.html')
+        comments = response.context['comments']
+        self.assertEqual(list(comments), expected[3:])
+        self.assertFalse(comments.has_next())
+
+
+class TimelineViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Пост до подписки',
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(TimelineViewsTest.user)
+        cache.clear()
+
+    def get_feed(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return [post.id for post in response.context['page_obj']]
+
+    def test_follow_backfills_and_unfollow_prunes_timeline(self):
+        """Подписка заполняет ленту, отписка очищает ее от постов автора."""
+        self.authorized_client.post(reverse(
+            'posts:profile_follow',
+            kwargs={'username': TimelineViewsTest.author.username}
+        ))
+        self.assertEqual(self.get_feed(), [TimelineViewsTest.post.id])
+        new_post = Post.objects.create(
+            author=TimelineViewsTest.author,
+            text='Пост после подписки',
+        )
+        self.assertEqual(
+            self.get_feed(), [new_post.id, TimelineViewsTest.post.id]
+        )
+        self.authorized_client.post(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': TimelineViewsTest.author.username}
+        ))
+        self.assertEqual(self.get_feed(), [])
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=TimelineViewsTest.user).exists()
+        )
+
+    @override_settings(TIMELINE_CELEBRITY_FOLLOWERS=0)
+    def test_celebrity_posts_are_read_on_demand(self):
+        """Посты «знаменитостей» не раскладываются, но видны в ленте."""
+        Follow.objects.create(
+            user=TimelineViewsTest.user,
+            author=TimelineViewsTest.author,
+        )
+        new_post = Post.objects.create(
+            author=TimelineViewsTest.author,
+            text='Пост знаменитости',
+        )
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(
+            self.get_feed(), [new_post.id, TimelineViewsTest.post.id]
+        )
+
+    @override_settings(TIMELINE_CELEBRITY_FOLLOWERS=1)
+    def test_former_celebrity_posts_are_materialized(self):
+        """Посты автора, ставшего обычным, раскладываются по лентам."""
+        other = User.objects.create_user(username='other')
+        for user in (TimelineViewsTest.user, other):
+            Follow.objects.create(user=user, author=TimelineViewsTest.author)
+        new_post = Post.objects.create(
+            author=TimelineViewsTest.author,
+            text='Пост знаменитости',
+        )
+        self.assertFalse(TimelineEntry.objects.filter(post=new_post).exists())
+        Follow.objects.filter(user=other).delete()
+        # флаг снимает фоновая задача, до нее посты читаются по-прежнему
+        self.assertEqual(
+            self.get_feed(), [new_post.id, TimelineViewsTest.post.id]
+        )
+        run_pending()
+        self.assertFalse(is_celebrity(TimelineViewsTest.author.pk))
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(
+                user=TimelineViewsTest.user
+            ).order_by('-created').values_list('post_id', 'created')),
+            [(new_post.id, new_post.created),
+             (TimelineViewsTest.post.id, TimelineViewsTest.post.created)],
+        )
+        self.assertEqual(
+            self.get_feed(), [new_post.id, TimelineViewsTest.post.id]
+        )
+
+    def test_repair_counters_applies_new_threshold(self):
+        Follow.objects.create(
+            user=TimelineViewsTest.user, author=TimelineViewsTest.author
+        )
+        with override_settings(TIMELINE_CELEBRITY_FOLLOWERS=0):
+            call_command('repair_counters', stdout=StringIO())
+        self.assertTrue(is_celebrity(TimelineViewsTest.author.pk))
+        call_command('repair_counters', stdout=StringIO())
+        run_pending()
+        self.assertFalse(is_celebrity(TimelineViewsTest.author.pk))
+        self.assertEqual(self.get_feed(), [TimelineViewsTest.post.id])
+
+
+class MissingAuthorStatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_of_user_created_without_signals(self):
+        """Пользователь из bulk_create получает статистику при показе."""
+        author = User.objects.bulk_create([User(username='imported')])[0]
+        if author.pk is None:
+            author = User.objects.get(username='imported')
+        post = Post.objects.create(author=author, text='Импортированный')
+        for url in (
+            reverse('posts:profile', kwargs={'username': 'imported'}),
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['posts_count'], 1)
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый пост',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_revalidation_returns_not_modified(self):
+        """Повторный запрос с ETag получает 304, после записи — 200."""
+        url = reverse(
+            'posts:post_detail',
+            kwargs={'post_id': AnonymousPageCacheTest.post.id}
+        )
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(
+            author=AnonymousPageCacheTest.author, text='Новый'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_page_is_served_from_cache_until_scope_changes(self):
+        """Страница берется из кеша без запросов к базе, кроме областей."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, 'Тестовый пост')
+        Post.objects.create(
+            author=AnonymousPageCacheTest.author, text='Новый'
+        )
+        self.assertContains(self.client.get(url), 'Новый')
+
+    def test_unknown_query_params_share_the_page(self):
+        """Посторонние параметры запроса не создают новых записей кеша."""
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'utm_source': 'mail', 'x': 1})
+        self.assertEqual(response['ETag'], etag)
+        response = self.client.get(url, {'page': 2, 'utm_source': 'mail'})
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_authorized_client_is_not_cached(self):
+        client = Client()
+        client.force_login(AnonymousPageCacheTest.author)
+        response = client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,162 @@
+"""
+Лента подписок, материализованная при записи (fan-out-on-write).
+
+Новый пост сразу раскладывается в ленты всех подписчиков автора, и
+follow_index читает готовую ленту пользователя одним диапазоном индекса
+timeline_user_created_idx. Посты «знаменитостей» (AuthorStats.celebrity)
+не раскладываются, а подмешиваются в ленту при чтении.
+
+Режим автора хранится во флаге, а не вычисляется из числа подписчиков
+при каждом обращении, поэтому запись и чтение всегда согласованы.
+update_celebrity переключает флаг, когда число подписчиков пересекает
+TIMELINE_CELEBRITY_FOLLOWERS: вверх — сразу, вниз — только после того,
+как задача materialize разложит посты автора по лентам подписчиков.
+После изменения порога флаги приводит в порядок repair_counters.
+"""
+from collections import defaultdict
+
+from core.models import Task
+from django.conf import settings
+from django.db.models import F, Q
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+
+FEED_ORDERING = ('-feed_created', '-feed_post')
+
+
+def is_celebrity(author_id) -> bool:
+    return AuthorStats.objects.filter(pk=author_id, celebrity=True).exists()
+
+
+def _bulk_add(entries):
+    """Записи ленты из троек (пользователь, пост, дата публикации)."""
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=post_id, created=created)
+            for user_id, post_id, created in entries
+        ),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def _followers(author_id):
+    return Follow.objects.filter(author=author_id).values_list(
+        'user_id', flat=True
+    ).iterator(chunk_size=settings.TIMELINE_BATCH_SIZE)
+
+
+def fan_out(post):
+    """Добавляет пост в ленты всех подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    _bulk_add(
+        (user_id, post.pk, post.created)
+        for user_id in _followers(post.author_id)
+    )
+
+
+def fan_out_many(posts):
+    """Добавляет пачку постов в ленты подписчиков их авторов."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    celebrities = set(AuthorStats.objects.filter(
+        pk__in=by_author, celebrity=True
+    ).values_list('pk', flat=True))
+    followers = Follow.objects.filter(
+        author__in=set(by_author) - celebrities
+    ).values_list('user_id', 'author_id')
+    _bulk_add(
+        (user_id, post.pk, post.created)
+        for user_id, author_id in followers.iterator(
+            chunk_size=settings.TIMELINE_BATCH_SIZE
+        )
+        for post in by_author[author_id]
+    )
+
+
+def _author_posts(author_id):
+    return Post.objects.filter(author=author_id).values_list(
+        'id', 'created'
+    ).iterator(chunk_size=settings.TIMELINE_BATCH_SIZE)
+
+
+def backfill(user_id, author_id):
+    """Заполняет ленту нового подписчика уже опубликованными постами."""
+    if is_celebrity(author_id):
+        return
+    _bulk_add(
+        (user_id, post_id, created)
+        for post_id, created in _author_posts(author_id)
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user=user_id, post__author=author_id
+    ).delete()
+
+
+def update_celebrity(author_id):
+    """Переключает режим автора, если число подписчиков пересекло порог."""
+    stats = AuthorStats.objects.filter(pk=author_id).values(
+        'followers_count', 'celebrity'
+    ).first()
+    if stats is None:
+        return
+    above = stats['followers_count'] > settings.TIMELINE_CELEBRITY_FOLLOWERS
+    if above and not stats['celebrity']:
+        # разложенные раньше записи не мешают: чтение объединяет ленту
+        # с постами знаменитостей
+        AuthorStats.objects.filter(pk=author_id).update(celebrity=True)
+    elif not above and stats['celebrity']:
+        Task.objects.enqueue('posts.tasks.materialize_timelines', author_id)
+
+
+def materialize(author_id):
+    """
+    Раскладывает посты знаменитости, потерявшей подписчиков, по лентам
+    и снимает флаг. Вызывается в транзакции задачи: UPDATE флага
+    блокирует строку AuthorStats, которую обновляет и создание поста
+    (counters.post_added), поэтому пост, создаваемый одновременно,
+    либо увидит снятый флаг и разложится сам, либо будет прочитан
+    здесь после своей фиксации.
+    """
+    demoted = AuthorStats.objects.filter(
+        pk=author_id,
+        celebrity=True,
+        followers_count__lte=settings.TIMELINE_CELEBRITY_FOLLOWERS,
+    ).update(celebrity=False)
+    if not demoted:
+        return
+    for user_id in _followers(author_id):
+        _bulk_add(
+            (user_id, post_id, created)
+            for post_id, created in _author_posts(author_id)
+        )
+
+
+def get_materialized_feed(user):
+    """Посты ленты из TimelineEntry, без постов знаменитостей."""
+    return Post.objects.filter(timeline_entries__user=user).annotate(
+        feed_created=F('timeline_entries__created'),
+        feed_post=F('timeline_entries__post'),
+    )
+
+
+def get_feed(user):
+    """
+    Посты ленты подписок пользователя с аннотациями для FEED_ORDERING.
+    Без знаменитостей лента читается только из TimelineEntry.
+    """
+    celebrities = list(Follow.objects.filter(
+        user=user, author__stats__celebrity=True
+    ).values_list('author_id', flat=True))
+    if not celebrities:
+        return get_materialized_feed(user)
+    return Post.objects.filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values('post_id'))
+        | Q(author__in=celebrities)
+    ).annotate(feed_created=F('created'), feed_post=F('id'))
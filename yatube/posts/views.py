@@ -1,42 +1,89 @@
-from core.utils import get_page_obj
+from core.decorators import anonymous_page_cache
+from core.utils import get_comments_page, get_fragment_cache, get_page_obj
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.http import urlencode
 
+from . import counters, timeline
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
+from .models import Follow, Group, Post, User
+from .search import SEARCH_ORDERING, search_posts
 
 
+def index_scopes():
+    return ('index', 'users', 'groups')
+
+
+def group_scopes(slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True
+    ).first()
+    return group_id and (f'group:{group_id}', 'users')
+
+
+def profile_scopes(username):
+    author_id = User.objects.filter(username=username).values_list(
+        'id', flat=True
+    ).first()
+    return author_id and (f'profile:{author_id}', 'groups')
+
+
+def post_scopes(post_id):
+    author_id = Post.objects.filter(id=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    return author_id and (
+        f'post:{post_id}', f'profile:{author_id}', 'users', 'groups'
+    )
+
+
+@anonymous_page_cache(index_scopes)
 def index(request):
-    post_list = Post.objects.select_related(
-        'author', 'group'
-    ).all().annotate(comments_count=Count('comments'))
+    post_list = Post.objects.select_related('author', 'group').all()
     context = {
         'page_obj': get_page_obj(request, post_list),
+        **get_fragment_cache(request, 'index', 'users', 'groups'),
     }
     return render(request, 'posts/index.html', context)
 
 
+@anonymous_page_cache(index_scopes)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    post_list = search_posts(
+        query, Post.objects.select_related('author', 'group')
+    ).order_by(*SEARCH_ORDERING)
+    context = {
+        'query': query,
+        'page_obj': get_page_obj(request, post_list, SEARCH_ORDERING),
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@anonymous_page_cache(group_scopes)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author').all().annotate(
-        comments_count=Count('comments')
-    )
+    post_list = group.posts.select_related('author').all()
     context = {
         'page_obj': get_page_obj(request, post_list),
         'group': group,
+        **get_fragment_cache(request, f'group:{group.id}', 'users'),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@anonymous_page_cache(profile_scopes)
 def profile(request, username):
-    author = User.objects.get(username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username
+    )
     posts = Post.objects.select_related(
         'author', 'group'
-    ).filter(author=author).all().annotate(
-        comments_count=Count('comments'),
-    )
-    posts_count = posts.count()
+    ).filter(author=author).all()
+    posts_count = counters.get_author_stats(author).posts_count
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user,
         author=author
@@ -46,28 +93,38 @@ def profile(request, username):
         'posts_count': posts_count,
         'author': author,
         'following': following,
+        **get_fragment_cache(request, f'profile:{author.id}', 'groups'),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@anonymous_page_cache(post_scopes)
 def post_detail(request, post_id):
     post = get_object_or_404(
-        Post.objects.select_related('author', 'group'),
+        Post.objects.select_related('author__stats', 'group'),
         id=post_id
     )
-    posts_count = Post.objects.filter(author=post.author).count()
+    posts_count = counters.get_author_stats(post.author).posts_count
     comment_form = CommentForm(request.POST or None)
-    comments = Comment.objects.select_related('author').filter(
-        post=post).all()
     context = {
         'post': post,
         'posts_count': posts_count,
         'form': comment_form,
-        'comments': comments,
+        'comments': get_comments_page(request, post),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@anonymous_page_cache(post_scopes)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    context = {
+        'post': post,
+        'comments': get_comments_page(request, post),
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -106,6 +163,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -119,13 +177,13 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.select_related(
+    post_list = timeline.get_feed(request.user).select_related(
         'author', 'group'
-    ).filter(author__following__user=request.user).all().annotate(
-        comments_count=Count('comments')
     )
     context = {
-        'page_obj': get_page_obj(request, post_list),
+        'page_obj': get_page_obj(
+            request, post_list, timeline.FEED_ORDERING
+        ),
     }
     return render(request, 'posts/follow.html', context)
 
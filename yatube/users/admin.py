@@ -1,6 +1,14 @@
+from core.paginator import EstimatedCountPaginator
 from django.contrib import admin
-from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
 from .models import User
 
-admin.site.register(User, UserAdmin)
+
+@admin.register(User)
+class UserAdmin(BaseUserAdmin):
+    # префиксный поиск по индексу 0006_username_prefix_index; он же
+    # используется виджетом автодополнения авторов в постах
+    search_fields = ('^username', )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
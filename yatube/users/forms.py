@@ -1,7 +1,11 @@
+from django.contrib.auth import forms as auth_forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from django.contrib.sites.shortcuts import get_current_site
 from django.forms import ModelForm
 
+from .tasks import send_password_reset
+
 User = get_user_model()
 
 
@@ -15,3 +19,30 @@ class UserForm(ModelForm):
     class Meta:
         model = User
         fields = ('first_name', 'last_name', 'email', 'image')
+
+
+class PasswordResetForm(auth_forms.PasswordResetForm):
+    """
+    Письмо для сброса пароля отправляется фоновой задачей. В очередь
+    ставится только pk пользователя: uid и токен создает воркер, чтобы
+    ссылка для входа не хранилась в Task.payload. Токены всегда
+    создает default_token_generator.
+    """
+
+    def save(self, domain_override=None,
+             subject_template_name='registration/password_reset_subject.txt',
+             email_template_name='registration/password_reset_email.html',
+             use_https=False, token_generator=None, from_email=None,
+             request=None, html_email_template_name=None,
+             extra_email_context=None):
+        if domain_override:
+            site_name = domain = domain_override
+        else:
+            current_site = get_current_site(request)
+            site_name, domain = current_site.name, current_site.domain
+        for user in self.get_users(self.cleaned_data['email']):
+            send_password_reset.enqueue(
+                user.pk, domain, site_name, use_https,
+                subject_template_name, email_template_name,
+                from_email, html_email_template_name, extra_email_context,
+            )
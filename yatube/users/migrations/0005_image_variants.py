@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='image_variants',
+            field=models.TextField(blank=True, editable=False, help_text='JSON со списком копий разной ширины и формата', verbose_name='Варианты картинки'),
+        ),
+    ]
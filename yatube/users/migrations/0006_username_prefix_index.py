@@ -0,0 +1,46 @@
+from core.operations import drop_invalid_index
+from django.db import migrations
+
+# индекс по выражению не описать через models.Index в Django 2.2,
+# поэтому вместо AddIndexConcurrently — SQL с тем же CONCURRENTLY
+SQL = {
+    # istartswith на PostgreSQL: UPPER("username"::text) LIKE UPPER(...)
+    'postgresql': (
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS user_username_upper_like '
+        'ON auth_user (UPPER(username::text) text_pattern_ops)',
+        'DROP INDEX CONCURRENTLY IF EXISTS user_username_upper_like',
+    ),
+    # LIKE в SQLite без учета регистра использует индекс с NOCASE
+    'sqlite': (
+        'CREATE INDEX IF NOT EXISTS user_username_nocase ON auth_user '
+        '(username COLLATE NOCASE)',
+        'DROP INDEX IF EXISTS user_username_nocase',
+    ),
+}
+
+
+def create_index(apps, schema_editor):
+    statements = SQL.get(schema_editor.connection.vendor)
+    if schema_editor.connection.vendor == 'postgresql':
+        drop_invalid_index(schema_editor, 'user_username_upper_like')
+    if statements:
+        schema_editor.execute(statements[0])
+
+
+def drop_index(apps, schema_editor):
+    statements = SQL.get(schema_editor.connection.vendor)
+    if statements:
+        schema_editor.execute(statements[1])
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('users', '0005_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,8 +1,15 @@
+from core.deletion import DeletionScopeQuerySet
+from core.models import DeletionScopeModel, ImageModel
 from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import UserManager as BaseUserManager
 from django.db import models
 
 
-class User(AbstractUser):
+class UserManager(BaseUserManager.from_queryset(DeletionScopeQuerySet)):
+    pass
+
+
+class User(DeletionScopeModel, ImageModel, AbstractUser):
     image = models.ImageField(
         upload_to='users/',
         blank=True,
@@ -11,6 +18,10 @@ class User(AbstractUser):
         help_text='Выберите аватар',
     )
 
+    objects = UserManager()
+
+    image_derivatives = ('avatar',)
+
     def get_name(self):
         return self.get_full_name() or self.get_username()
 
@@ -1,6 +1,14 @@
+import re
+
+from core.models import Task
+from core.queue import run_pending
 from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
 from django.test import TestCase
 from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
 
 User = get_user_model()
 
@@ -9,3 +17,24 @@ class UsersViewsTests(TestCase):
     def test_signup_url_uses_correct_template(self):
         response = self.client.get(reverse('users:signup'))
         self.assertTemplateUsed(response, 'users/signup.html')
+
+    def test_password_reset_mail_is_sent_by_worker(self):
+        """Письмо сброса пароля отправляет воркер, а не запрос."""
+        user = User.objects.create_user(
+            username='user', email='user@example.com', password='password'
+        )
+        response = self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'user@example.com'},
+        )
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(len(mail.outbox), 0)
+        payload = Task.objects.get().payload
+        run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+        uid = urlsafe_base64_encode(force_bytes(user.pk))
+        token = re.search(rf'/{uid}/([\w-]+)/', mail.outbox[0].body)[1]
+        self.assertTrue(default_token_generator.check_token(user, token))
+        # ссылка для входа не хранится в очереди
+        self.assertNotIn(token, payload)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from datetime import timedelta
 from dotenv import load_dotenv
@@ -13,12 +14,28 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Кеш общий для всех воркеров: memcached (CACHE_BACKEND=
+# core.cache_backends.MemcachedCache, CACHE_LOCATION=host:port) или,
+# по умолчанию, файл SQLite на локальной машине
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'core.cache_backends.SQLiteCache'
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'yatube', 'cache.sqlite3'),
+        ),
+        'TIMEOUT': 60 * 60,
     }
 }
 
+# Фрагменты лент сбрасываются сменой версии при записи, а не по таймауту
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 6
+FRAGMENT_CACHE_PAGES = 5
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+PAGE_CACHE_TIMEOUT = 60 * 60
+
 SECRET_KEY = os.getenv('DJANGO_SECRET_KEY', 'SECRET_KEY')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -120,6 +137,38 @@ USE_L10N = True
 USE_TZ = True
 
 ITEMS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+
+# Количество записей для паджинаторов (core.counting): выборки больше
+# порога считаются по оценке планировщика PostgreSQL; результат
+# кешируется и сбрасывается при записи в таблицу
+COUNT_ESTIMATE_THRESHOLD = 10000
+COUNT_CACHE_TIMEOUT = 60 * 5
+COUNTED_MODELS = [
+    'posts.Post', 'posts.Comment', 'posts.Group', 'posts.Follow', 'users.User',
+]
+
+# Паджинация HTML-лент по курсору (created, id) вместо OFFSET и COUNT(*)
+KEYSET_PAGINATION = True
+
+# Лента подписок: посты авторов с большим числом подписчиков
+# не раскладываются по лентам, а подмешиваются при чтении
+TIMELINE_CELEBRITY_FOLLOWERS = 1000
+TIMELINE_BATCH_SIZE = 1000
+
+# Массовое создание постов и комментариев через API
+BULK_CREATE_MAX_ITEMS = 1000
+BULK_CREATE_BATCH_SIZE = 500
+
+# Размер пачки потоковой выгрузки списков API (?stream=true)
+API_STREAM_CHUNK_SIZE = 500
+
+# Автодополнение: результатов по умолчанию, наибольшее число записей
+# модели, при котором префиксный индекс держится в памяти процесса, и
+# через сколько секунд индекс загружается заново (обновляются веса)
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MEMORY_LIMIT = 200000
+AUTOCOMPLETE_REFRESH_INTERVAL = 300
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -127,7 +176,17 @@ LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Очередь фоновых задач core.queue (время в секундах)
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 10
+TASK_RETRY_MAX_DELAY = 60 * 60
+TASK_LEASE = 60 * 5
+
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],